@@ -1,41 +1,160 @@
+import functools
+import gzip
+import hashlib
 import json
+import logging
 import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import ResourceNotFoundError
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import OpenApiTool, OpenApiManagedAuthDetails, OpenApiManagedSecurityScheme
-from utils import bind_parameters, get_azure_credential
+from utils import bind_parameters, get_azure_credential, json_dumps, json_loads
+
+_ENV = os.environ
+
+# Only this script's logger follows LOG_LEVEL; the Azure SDK loggers stay at WARNING
+logging.basicConfig(level=logging.WARNING, format="%(message)s")
+log = logging.getLogger(__name__)
+log.setLevel(_ENV.get("LOG_LEVEL", "INFO").upper())
+
+# Map of config keys (used as ${key} placeholders) to their environment variables
+_CONFIG_ENV_KEYS = {
+    "language_resource_url": "LANGUAGE_ENDPOINT",
+    "clu_project_name": "CLU_PROJECT_NAME",
+    "clu_deployment_name": "CLU_DEPLOYMENT_NAME",
+    "cqa_project_name": "CQA_PROJECT_NAME",
+    "cqa_deployment_name": "CQA_DEPLOYMENT_NAME",
+    "translator_resource_id": "TRANSLATOR_RESOURCE_ID",
+    "translator_region": "TRANSLATOR_REGION",
+}
+
+DELETE_OLD_AGENTS = _ENV.get("DELETE_OLD_AGENTS", "false").lower() == "true"
+DELETE_WORKERS = int(_ENV.get("DELETE_WORKERS", 16))
+PROJECT_ENDPOINT = _ENV.get("AGENTS_PROJECT_ENDPOINT")
+MODEL_NAME = _ENV.get("AOAI_DEPLOYMENT")
+CONFIG_DIR = _ENV.get("CONFIG_DIR", ".")
+config_file = os.path.join(CONFIG_DIR, "config.json")
+SPEC_CACHE_DIR = _ENV.get("SPEC_CACHE_DIR", ".cache")
+
+config = {key: _ENV.get(env_var) for key, env_var in _CONFIG_ENV_KEYS.items()}
+
+# 1) The triage agent which can use CLU or CQA tools to answer questions or extract intent
+TRIAGE_AGENT_NAME = "TriageAgent"
+# 2) The head support agent which takes in CLU intents and entities and routes the request to the appropriate support agent
+HEAD_SUPPORT_AGENT_NAME = "HeadSupportAgent"
+# 3) The custom agents for handling specific intents (our examples are OrderStatus, OrderCancel, and OrderRefund). Plugin tools will be added to these agents when we turn them into Semantic Kernel agents.
+ORDER_STATUS_AGENT_NAME = "OrderStatusAgent"
+ORDER_CANCEL_AGENT_NAME = "OrderCancelAgent"
+ORDER_REFUND_AGENT_NAME = "OrderRefundAgent"
+# 4) The translation agent
+TRANSLATION_AGENT_NAME = "TranslationAgent"
+
+# Instruction prompt file of each agent, relative to PROMPTS_DIR
+AGENT_PROMPTS = {
+    TRIAGE_AGENT_NAME: "triage_agent.txt",
+    HEAD_SUPPORT_AGENT_NAME: "head_support_agent.txt",
+    ORDER_STATUS_AGENT_NAME: "order_agent.txt",
+    ORDER_CANCEL_AGENT_NAME: "order_agent.txt",
+    ORDER_REFUND_AGENT_NAME: "order_agent.txt",
+    TRANSLATION_AGENT_NAME: "translation_agent.txt",
+}
+
+# The custom order agents share one prompt template, bound with these per-agent parameters
+ORDER_AGENTS = {
+    "ORDER_STATUS_AGENT_ID": (ORDER_STATUS_AGENT_NAME, {
+        "agent_task": "checks order status",
+        "plugin_name": "OrderStatusPlugin",
+        "plugin_task": "check the status of an order",
+        "response_name": "OrderStatusResponse",
+    }),
+    "ORDER_CANCEL_AGENT_ID": (ORDER_CANCEL_AGENT_NAME, {
+        "agent_task": "handles order cancellations",
+        "plugin_name": "OrderCancellationPlugin",
+        "plugin_task": "handle order cancellation requests",
+        "response_name": "OrderCancellationResponse",
+    }),
+    "ORDER_REFUND_AGENT_ID": (ORDER_REFUND_AGENT_NAME, {
+        "agent_task": "handles order refunds",
+        "plugin_name": "OrderRefundPlugin",
+        "plugin_task": "handle order refund requests",
+        "response_name": "OrderRefundResponse",
+    }),
+}
+ORDER_AGENT_PARAMETERS = dict(ORDER_AGENTS.values())
+AGENT_NAMES = frozenset(AGENT_PROMPTS)
+PROMPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts")
+
+
+@functools.lru_cache(maxsize=None)
+def get_agent_instructions(agent_name: str) -> str:
+    """
+    Load an agent's instructions prompt and bind its ${key} placeholders to the setup config, once per agent.
+    """
+    parameters = {**config, **ORDER_AGENT_PARAMETERS.get(agent_name, {})}
+    with open(os.path.join(PROMPTS_DIR, AGENT_PROMPTS[agent_name]), "r", encoding="utf-8") as f:
+        return bind_parameters(f.read(), parameters)
 
-config = {}
 
-DELETE_OLD_AGENTS = os.environ.get("DELETE_OLD_AGENTS", "false").lower() == "true"
-PROJECT_ENDPOINT = os.environ.get("AGENTS_PROJECT_ENDPOINT")
-MODEL_NAME = os.environ.get("AOAI_DEPLOYMENT")
-CONFIG_DIR = os.environ.get("CONFIG_DIR", ".")
-config_file = os.path.join(CONFIG_DIR, "config.json")
+@functools.lru_cache(maxsize=1)
+def get_agents_client() -> AgentsClient:
+    """
+    Create the agent client on first use.
+    """
+    return AgentsClient(
+        endpoint=PROJECT_ENDPOINT,
+        credential=get_azure_credential(),
+        api_version="2025-05-15-preview"
+    )
+
 
-config['language_resource_url'] = os.environ.get("LANGUAGE_ENDPOINT")
-config['clu_project_name'] = os.environ.get("CLU_PROJECT_NAME")
-config['clu_deployment_name'] = os.environ.get("CLU_DEPLOYMENT_NAME")
-config['cqa_project_name'] = os.environ.get("CQA_PROJECT_NAME")
-config['cqa_deployment_name'] = os.environ.get("CQA_DEPLOYMENT_NAME")
-config['translator_resource_id'] = os.environ.get("TRANSLATOR_RESOURCE_ID")
-config['translator_region'] = os.environ.get("TRANSLATOR_REGION")
-config['translator_resource_id'] = os.environ.get("TRANSLATOR_RESOURCE_ID")
+def load_openapi_spec(path: str, config: dict) -> dict:
+    """
+    Read an OpenAPI spec file and bind its ${key} placeholders to config values.
+    The bound spec is cached gzipped in SPEC_CACHE_DIR, keyed by the spec contents and config.
+    """
+    with open(path, "rb") as f:
+        spec_bytes = f.read()
+
+    key = hashlib.sha1(spec_bytes + json.dumps(config, sort_keys=True).encode()).hexdigest()
+    name = os.path.splitext(os.path.basename(path))[0]
+    cache_file = os.path.join(SPEC_CACHE_DIR, f"{name}.{key}.json.gz")
+
+    # A missing, truncated or otherwise unreadable cache file is a cache miss
+    try:
+        with gzip.open(cache_file, "rb") as f:
+            return json_loads(f.read())
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, ValueError, zlib.error) as e:
+        log.warning("Ignoring unreadable OpenAPI spec cache %s: %s", cache_file, e)
+
+    spec = json_loads(bind_parameters(spec_bytes.decode("utf-8"), config))
+
+    try:
+        os.makedirs(SPEC_CACHE_DIR, exist_ok=True)
+        # Write to a temp file and rename so an interrupted run never leaves a partial cache file
+        tmp_cache_file = cache_file + ".tmp"
+        with gzip.open(tmp_cache_file, "wb") as f:
+            f.write(json_dumps(spec).encode("utf-8"))
+        os.replace(tmp_cache_file, cache_file)
+    except OSError as e:
+        log.warning("Unable to cache OpenAPI spec %s: %s", path, e)
 
-# Create agent client
-agents_client = AgentsClient(
-    endpoint=PROJECT_ENDPOINT,
-    credential=get_azure_credential(),
-    api_version="2025-05-15-preview"
-)
+    return spec
 
 
 def create_tools(config):
     # Set up the auth details for the OpenAPI connection
     auth = OpenApiManagedAuthDetails(security_scheme=OpenApiManagedSecurityScheme(audience="https://cognitiveservices.azure.com/"))
 
-    # Read in the CLU OpenAPI spec
-    with open("clu_convai.json", "r") as f:
-        clu_openapi_spec = json.loads(bind_parameters(f.read(), config))
+    # Read in the CLU, CQA and Translation OpenAPI specs concurrently
+    spec_files = ["clu_convai.json", "cqa.json", "translation.json"]
+    with ThreadPoolExecutor(max_workers=len(spec_files)) as executor:
+        clu_openapi_spec, cqa_openapi_spec, translation_openapi_spec = executor.map(
+            lambda path: load_openapi_spec(path, config),
+            spec_files
+        )
 
     clu_api_tool = OpenApiTool(
         name="clu_api",
@@ -44,10 +163,6 @@ def create_tools(config):
         auth=auth
     )
 
-    # Read in the CQA OpenAPI spec
-    with open("cqa.json", "r") as f:
-        cqa_openapi_spec = json.loads(bind_parameters(f.read(), config))
-
     # Initialize an Agent OpenApi tool using the read in OpenAPI spec
     cqa_api_tool = OpenApiTool(
         name="cqa_api",
@@ -56,10 +171,6 @@ def create_tools(config):
         auth=auth
     )
 
-    # Read in the Translation OpenAPI spec
-    with open("translation.json", "r") as f:
-        translation_openapi_spec = json.loads(bind_parameters(f.read(), config))
-
     # Initialize an Agent OpenApi tool using the read in OpenAPI spec
     translation_api_tool = OpenApiTool(
         name="translation_api",
@@ -71,269 +182,142 @@ def create_tools(config):
     return clu_api_tool, cqa_api_tool, translation_api_tool
 
 
-with agents_client:
-    # If DELETE_OLD_AGENTS is set to true, delete all existing agents in the project
-    if DELETE_OLD_AGENTS:
-        print("Deleting all existing agents in the project...")
-        agents = agents_client.list_agents()
-        for agent in agents:
-            print(f"Deleting agent: {agent.name} with ID: {agent.id}")
-            agents_client.delete_agent(agent.id)
-
-    # Create the tools needed for the agents
-    clu_api_tool, cqa_api_tool, translation_api_tool = create_tools(config)
+def read_agent_ids() -> dict:
+    """
+    Read the agent IDs written to config.json by a previous run, if any.
+    """
+    try:
+        with open(config_file, "rb") as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
 
-    # 1) Create the triage agent which can use CLU or CQA tools to answer questions or extract intent
-    TRIAGE_AGENT_NAME = "TriageAgent"
-    TRIAGE_AGENT_INSTRUCTIONS = """
-    You are a triage agent. Your goal is to understand customer intent and redirect messages accordingly. You are required to use ONE of the OpenAPI tools provided. You have at your disposition 2 tools but can only use ONE:
-            1. **cqa_api**: to answer general FAQs and procedural questions that do NOT depend on a customer-specific context (e.g. “What's the return policy?”, “What are your store hours?”).
-            2. **clu_api**: to extract customer-specific intent or order-specific intent ("What is the status of order 1234" or "I want to cancel order 12345")
-
-    You must always call ONE of the API tools.
-
-    ---
-    Input Format:
-    You will receive a JSON object. Only read from the "response" field, which is itself a nested JSON object. Inside this "response" object, only extract and use the value of the "current_question" field. Ignore all other fields in the outer or inner JSON.
-
-    For example, from this input:
-    {
-    "origin_language": "es",
-    "response": {
-        "current_question": <current message>
-    },
-    "target_language": "en"
-    }
 
-    You must only process:
-    <current message>
-    If the <current message> is related to an FAQ, call the CQA API. Otherwise, this structured input allows you to analyze intent in multi-turn conversations using the CLU API.
-
-    ---
-    Available Tools:
-    ---
-    To use the CLU API:
-    You must convert the input JSON into the following clu_api request format. You MUST keep the parameters field in the payload - this is extremely critical. Do NOT put analysisInput inside the parameters field. You must not add any additional fields. You must use the api version of 2025-05-15-preview - this is EXTREMELY CRITICAL as a query parameter (?api-version=2025-05-15-preview)
-    No matter what, you must always use the "api-version": "2025-05-15-preview"
-    payload = {
-        "api-version": "2025-05-15-preview"
-        "kind": "ConversationalAI",
-        "parameters": {
-            "projectName": ${clu_project_name},
-            "deploymentName": ${clu_deployment_name},
-            "stringIndexType": "Utf16CodeUnit"
-        },
-        "analysisInput": {
-            "conversations": [
-                {
-                    "id": "order",
-                    "language": "en",
-                    "modality": "text",
-                    "conversationItems": [
-                        {"participantId": "user", "id": "1", "text": <msg1>},
-                        {"participantId": "system", "id": "2", "text": <msg2>},
-                    ]
-                }
-            ]
-        }
-    }
-    Use all history messages followed by the current question in the conversationItems array, with unique increasing IDs.
+def agent_matches(agent, agent_kwargs: dict) -> bool:
+    """
+    Check whether an existing agent already has the model, instructions, tools and sampling settings to apply.
+    Tools are compared in full, since their specs carry the bound language and translator endpoints.
+    """
+    def tool_dicts(tools) -> list:
+        return [tool.as_dict() for tool in tools or []]
+
+    return (
+        agent.model == MODEL_NAME
+        and agent.instructions == agent_kwargs["instructions"]
+        and tool_dicts(agent.tools) == tool_dicts(agent_kwargs.get("tools"))
+        and all(getattr(agent, key) == agent_kwargs[key] for key in ("temperature", "top_p") if key in agent_kwargs)
+    )
 
-    Return the raw API response in this format:
-    {
-    "type": "clu_result",
-    "response": { <FULL CLU API OUTPUT> },
-    "terminated": "False"
-    }
 
-    You must return the complete raw API response including all fields like "kind" and "result". Do not remove or restructure the API output. Your response must look like this:
-
-    {
-    "type": "clu_result",
-    "response": {
-        "kind": "ConversationalAIResult",
-        "result": {
-        "conversations": [...],
-        "warnings": [...]
-        }
-    },
-    "terminated": "False"
-    }
-    ---
-    When you return answers from the cqa_api, format the response as JSON: {"type": "cqa_result", "response": {cqa_response}, "terminated": "True"} where cqa_response is the full JSON API response from the cqa_api without rewriting or removing any info. Return immediately
-    ---
-    Do not:
-    - Modify or summarize the API responses.
-    - Embed the full input as a flat string.
+def get_or_create_agent(agents_client: AgentsClient, agent_id: str | None, agent_kwargs: dict):
     """
+    Reuse the agent with the given ID when it still exists, updating it if its model, instructions, tools
+    or sampling settings have changed. Otherwise create a new agent.
+    """
+    if agent_id:
+        try:
+            agent = agents_client.get_agent(agent_id)
+        except ResourceNotFoundError:
+            agent = None
 
-    TRIAGE_AGENT_INSTRUCTIONS = bind_parameters(TRIAGE_AGENT_INSTRUCTIONS, config)
+        if agent is not None and agent.name == agent_kwargs["name"]:
+            if agent_matches(agent, agent_kwargs):
+                log.info("Reusing agent: %s with ID: %s", agent.name, agent.id)
+                return agent
 
-    triage_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=TRIAGE_AGENT_NAME,
-        instructions=TRIAGE_AGENT_INSTRUCTIONS,
-        tools=clu_api_tool.definitions + cqa_api_tool.definitions,
-        temperature=0.2,
-        )
+            log.info("Updating agent: %s with ID: %s", agent.name, agent.id)
+            return agents_client.update_agent(agent.id, model=MODEL_NAME, **agent_kwargs)
 
-    # 2) Create the head support agent which takes in CLU intents and entities and routes the request to the appropriate support agent
-    HEAD_SUPPORT_AGENT_NAME = "HeadSupportAgent"
-    HEAD_SUPPORT_AGENT_INSTRUCTIONS = """
-     You are a head support agent that routes inquiries to the proper custom agent based on the provided intent and entities from the triage agent.
-        You must choose between the following agents:
-        - OrderStatusAgent: for order status inquiries
-        - OrderCancelAgent: for order cancellation inquiries
-        - OrderRefundAgent: for order refund inquiries
-
-        You must return the response in the following valid JSON format: {"target_agent": "<AgentName>","intent": "<IntentName>","entities": [<List of extracted entities>],"terminated": "False"}
-
-        Where:
-        - "target_agent" is the name of the agent you are routing to (must match one of the agent names above).
-        - "intent" is the top-level intent extracted from the CLU result.
-        - "entities" is a list of all entities extracted from the CLU result, including their category and value.
-    """
+    return agents_client.create_agent(model=MODEL_NAME, **agent_kwargs)
 
-    head_support_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=HEAD_SUPPORT_AGENT_NAME,
-        instructions=HEAD_SUPPORT_AGENT_INSTRUCTIONS,
-    )
 
-    # 3) Create the custom agents for handling specific intents (our examples are OrderStatus, OrderCancel, and OrderRefund). Plugin tools will be added to these agents when we turn them into Semantic Kernel agents.
-    ORDER_STATUS_AGENT_NAME = "OrderStatusAgent"
-    ORDER_STATUS_AGENT_INSTRUCTIONS = """
-    You are a customer support agent that checks order status. You must use the OrderStatusPlugin to check the status of an order. The plugin will return a string, which you must use as the <OrderStatusPlugin Response>.
-    If you need more info, the <OrderStatusResponse> should be "Please provide more information about your order so I can better assist you." and the JSON field "need_more_info" should be True.
-    You must return the response in the following valid JSON format: {"response": <OrderStatusResponse>, "terminated": "True", "need_more_info": <"True" or "False">}
+def write_agent_ids(agent_ids: dict) -> None:
     """
-
-    order_status_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=ORDER_STATUS_AGENT_NAME,
-        instructions=ORDER_STATUS_AGENT_INSTRUCTIONS,
-    )
-
-    ORDER_CANCEL_AGENT_NAME = "OrderCancelAgent"
-    ORDER_CANCEL_AGENT_INSTRUCTIONS = """
-    You are a customer support agent that handles order cancellations. You must use the OrderCancellationPlugin to handle order cancellation requests. The plugin will return a string, which you must use as the <OrderCancellationPlugin Response>.
-    If you need more info, the <OrderCancellationResponse> should be "Please provide more information about your order so I can better assist you." and the JSON field "need_more_info" should be True.
-    You must return the response in the following valid JSON format: {"response": <OrderCancellationResponse>, "terminated": "True", "need_more_info": <"True" or "False">}
+    Write the agent IDs to config.json, unless it already holds the same IDs.
     """
+    payload = json_dumps(agent_ids, indent=True)
 
-    order_cancel_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=ORDER_CANCEL_AGENT_NAME,
-        instructions=ORDER_CANCEL_AGENT_INSTRUCTIONS,
-    )
+    if read_agent_ids() == agent_ids:
+        log.info("Agent IDs unchanged in %s", config_file)
+    else:
+        try:
+            # Ensure the config directory exists
+            os.makedirs(CONFIG_DIR, exist_ok=True)
 
-    ORDER_REFUND_AGENT_NAME = "OrderRefundAgent"
-    ORDER_REFUND_AGENT_INSTRUCTIONS = """
-    You are a customer support agent that handles order refunds. You must use the OrderRefundPlugin to handle order refund requests. The plugin will return a string, which you must use as the <OrderRefundPlugin Response>.
-    If you need more info, the <OrderRefundResponse> should be "Please provide more information about your order so I can better assist you." and the JSON field "need_more_info" should be True.
-    You must return the response in the following valid JSON format: {"response": <OrderRefundResponse>, "terminated": "True", "need_more_info": <"True" or "False">}
-    """
+            # Write to a temp file and rename so a crash never leaves a partial config.json
+            tmp_config_file = config_file + ".tmp"
+            with open(tmp_config_file, 'w', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_config_file, config_file)
+            log.info("Agent IDs written to %s", config_file)
 
-    order_refund_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=ORDER_REFUND_AGENT_NAME,
-        instructions=ORDER_REFUND_AGENT_INSTRUCTIONS,
-    )
+        except Exception as e:
+            log.error("Error writing to %s: %s", config_file, e)
 
-    # 4) Create the translation agent
-    TRANSLATION_AGENT_NAME = "TranslationAgent"
-    TRANSLATION_AGENT_INSTRUCTIONS = """
-    You are a translation agent that uses the Azure Translator API to translate messages either into English or from English to the user’s original language.
+    # The IDs always go to stdout, whatever the log level, so deployment can capture them as env variables
+    print(payload)
 
-    There are two types of inputs you will receive:
 
-    ---
-    Mode 1: Translate to English
-    Input Example:
-    {
-    "query": <query>,
-    "to": "english"
-    }
+with get_agents_client() as agents_client:
+    # If DELETE_OLD_AGENTS is set to true, delete the existing agents created by this script
+    if DELETE_OLD_AGENTS:
+        log.info("Deleting existing agents in the project...")
+        agents = [agent for agent in agents_client.list_agents() if agent.name in AGENT_NAMES]
 
-    Instructions:
-    - Detect the language of "query".
-    - Translate the query to English.
-    - Return:
-    {
-    "origin_language": "<detected language>",
-    "response": {
-        "current_question": "<translated text>"
-    },
-    "target_language": "en"
-    }
+        def delete_agent(agent):
+            log.info("Deleting agent: %s with ID: %s", agent.name, agent.id)
+            agents_client.delete_agent(agent.id)
 
-    ---
-    Mode 2: Translate from English to original language - if no original language is given, assume English as the default
-    Input Example:
-    {
-    "response": <text>,
-    "terminated": <terminated boolean>,
-    "need_more_info": <need_more_info boolean>
-    }
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+            list(executor.map(delete_agent, agents))
 
-    Instructions:
-    - Assume the "response" is in English.
-    - Translate only the "response" field into the user's original language (this will be known from prior context).
-    -If no prior original language is given, assume English and use "to": "en" as the parameter
-
-    - Return:
-    {
-    "origin_language": "<user's language>",
-    "source_language": "en",
-    "response": {
-        "final_answer": "<translated text>",
-        "need_more_info": "need_more_info boolean"
-    }
+    # Create the tools needed for the agents
+    clu_api_tool, cqa_api_tool, translation_api_tool = create_tools(config)
+
+    # Read the tool definitions once; each access may rebuild them from the spec
+    triage_tools = clu_api_tool.definitions + cqa_api_tool.definitions
+    translation_tools = translation_api_tool.definitions
+
+    # Create (or reuse) all agents concurrently - the definitions do not depend on each other
+    agent_jobs = {
+        "TRIAGE_AGENT_ID": dict(
+            name=TRIAGE_AGENT_NAME,
+            instructions=get_agent_instructions(TRIAGE_AGENT_NAME),
+            tools=triage_tools,
+            temperature=0.2,
+        ),
+        "HEAD_SUPPORT_AGENT_ID": dict(
+            name=HEAD_SUPPORT_AGENT_NAME,
+            instructions=get_agent_instructions(HEAD_SUPPORT_AGENT_NAME),
+        ),
+        **{
+            agent_id_key: dict(
+                name=agent_name,
+                instructions=get_agent_instructions(agent_name),
+            )
+            for agent_id_key, (agent_name, _) in ORDER_AGENTS.items()
+        },
+        "TRANSLATION_AGENT_ID": dict(
+            name=TRANSLATION_AGENT_NAME,
+            instructions=get_agent_instructions(TRANSLATION_AGENT_NAME),
+            tools=translation_tools,
+        ),
     }
 
-    If "type" = "cqa_result," "need_more_info" should be False.
-    ---
-    API Usage Requirements:
-    - Always call Azure Translator API, version 3.0.
-    - Required headers:
-    - ocp-apim-resourceid: ${translator_resource_id}
-    - ocp-apim-subscription-region: ${translator_region}
-    - Use the "to=<target_language>" query parameter.
-    - Never return raw API output. Format your response exactly as described above.
-
-    Decide which mode to use by checking which fields are present in the input:
-    - If input contains "query" → use Mode 1.
-    - If input contains "response", "terminated", and "need_more_info" → use Mode 2.
-    """
+    # Agents recorded by a previous run are reused, unless they were just deleted
+    existing_agent_ids = {} if DELETE_OLD_AGENTS else read_agent_ids()
 
-    TRANSLATION_AGENT_INSTRUCTIONS = bind_parameters(TRANSLATION_AGENT_INSTRUCTIONS, config)
-    translation_agent_definition = agents_client.create_agent(
-        model=MODEL_NAME,
-        name=TRANSLATION_AGENT_NAME,
-        instructions=TRANSLATION_AGENT_INSTRUCTIONS,
-        tools=translation_api_tool.definitions,
-    )
+    with ThreadPoolExecutor(max_workers=len(agent_jobs)) as executor:
+        agent_definitions = executor.map(
+            lambda key: get_or_create_agent(agents_client, existing_agent_ids.get(key), agent_jobs[key]),
+            agent_jobs
+        )
 
     # Output the agent IDs in a JSON format to be captured as env variables
     agent_ids = {
-        "TRIAGE_AGENT_ID": triage_agent_definition.id,
-        "HEAD_SUPPORT_AGENT_ID": head_support_agent_definition.id,
-        "ORDER_STATUS_AGENT_ID": order_status_agent_definition.id,
-        "ORDER_CANCEL_AGENT_ID": order_cancel_agent_definition.id,
-        "ORDER_REFUND_AGENT_ID": order_refund_agent_definition.id,
-        "TRANSLATION_AGENT_ID": translation_agent_definition.id,
+        key: definition.id for key, definition in zip(agent_jobs, agent_definitions)
     }
 
-    # Write to config.json file
-    try:
-        # Ensure the config directory exists
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-
-        with open(config_file, 'w') as f:
-            json.dump(agent_ids, f, indent=2)
-        print(f"Agent IDs written to {config_file}")
-        print(json.dumps(agent_ids, indent=2))
-
-    except Exception as e:
-        print(f"Error writing to {config_file}: {e}")
-        print(json.dumps(agent_ids, indent=2))
+    write_agent_ids(agent_ids)
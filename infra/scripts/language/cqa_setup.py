@@ -2,27 +2,15 @@
 # Licensed under the MIT License.
 import os
 import json
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.ai.language.questionanswering.authoring import AuthoringClient
-
-
-def get_azure_credential():
-    use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
-
-    if use_mi_auth:
-        mi_client_id = os.environ['MI_CLIENT_ID']
-        return ManagedIdentityCredential(
-            client_id=mi_client_id
-        )
-
-    return DefaultAzureCredential()
+from utils import get_azure_credential
 
 
 project_name = os.environ['CQA_PROJECT_NAME']
 deployment_name = os.environ['CQA_DEPLOYMENT_NAME']
 
 endpoint = os.environ['LANGUAGE_ENDPOINT']
-credential = get_azure_credential()
+credential = get_azure_credential(wrap_scope=False)
 
 client = AuthoringClient(endpoint, credential)
 
@@ -2,20 +2,8 @@
 # Licensed under the MIT License.
 import os
 import json
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
 from azure.ai.language.conversations.authoring import ConversationAuthoringClient
-
-
-def get_azure_credential():
-    use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
-
-    if use_mi_auth:
-        mi_client_id = os.environ['MI_CLIENT_ID']
-        return ManagedIdentityCredential(
-            client_id=mi_client_id
-        )
-
-    return DefaultAzureCredential()
+from utils import get_azure_credential
 
 
 project_name = os.environ['ORCHESTRATION_PROJECT_NAME']
@@ -27,7 +15,7 @@ clu_deployment_name = os.environ['CLU_DEPLOYMENT_NAME']
 cqa_project_name = os.environ['CQA_PROJECT_NAME']
 
 endpoint = os.environ['LANGUAGE_ENDPOINT']
-credential = get_azure_credential()
+credential = get_azure_credential(wrap_scope=False)
 
 client = ConversationAuthoringClient(endpoint, credential)
 
@@ -0,0 +1,29 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+from utils import bind_parameters
+
+"""
+Unit tests for bind_parameters, used to fill in the agent setup templates.
+
+Launch this test suite using pytest:
+cd infra/scripts/language/
+pytest test_bind_parameters.py -v
+"""
+
+
+def test_binds_braced_placeholders():
+    assert bind_parameters("${endpoint}/language", {"endpoint": "https://x"}) == "https://x/language"
+
+
+def test_leaves_none_values_unbound():
+    template = '{"url": "${endpoint}", "key": "${api_key}"}'
+    assert bind_parameters(template, {"endpoint": "https://x", "api_key": None}) == '{"url": "https://x", "key": "${api_key}"}'
+
+
+def test_ignores_bare_dollar_names():
+    template = '{"$ref": "#/components/schemas/${schema}"}'
+    assert bind_parameters(template, {"schema": "Order", "ref": "unused"}) == '{"$ref": "#/components/schemas/Order"}'
+
+
+def test_returns_input_without_parameters():
+    assert bind_parameters("${endpoint}", {}) == "${endpoint}"
@@ -1,52 +1,136 @@
-import re
 import os
-from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+import json
+import string
+import time
+import threading
+import functools
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from azure.core.credentials import TokenCredential
-from azure.core.credentials import AccessToken
-
-
-def bind_parameters(input_string: str, parameters: dict) -> str:
-    """
-    Replace occurrences of '${key}' in the input string with the value of the key in the parameters dictionary.
-
-    :param input_string: The string containing keys of value to replace.
-    :param parameters: A dictionary containing the values to substitute in the input string.
-    :return: The modified string with parameters replaced.
-    """
-    if parameters is None:
-        return input_string
-
-    # Define the regex pattern to match '${key}'
-    parameter_binding_regex = re.compile(r"\$\{([^}]+)\}")
-
-    # Replace matches with corresponding values from the dictionary
-    return parameter_binding_regex.sub(
-        lambda match: parameters.get(match.group(1), match.group(0)),
-        input_string
-    )
-
-
+from azure.core.credentials import AccessToken, AccessTokenInfo
+
+
+def json_loads(data: str | bytes):
+    """
+    Parse JSON with orjson when available, falling back to the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data, indent: bool = False) -> str:
+    """
+    Serialize JSON with orjson when available, falling back to the standard library.
+    With indent, the output is pretty-printed with two-space indentation.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None).decode("utf-8")
+    return json.dumps(data, indent=2 if indent else None)
+
+
+class _ParameterTemplate(string.Template):
+    """
+    Template that only substitutes the braced '${key}' form - OpenAPI specs contain '$ref' and other bare '$' names.
+    """
+    pattern = r"""
+    \$(?:
+        (?P<escaped>(?!))|
+        (?P<named>(?!))|
+        {(?P<braced>[^}]+)}|
+        (?P<invalid>(?!))
+    )
+    """
+
+
+def bind_parameters(input_string: str, parameters: dict) -> str:
+    """
+    Replace occurrences of '${key}' in the input string with the value of the key in the parameters dictionary.
+
+    :param input_string: The string containing keys of value to replace.
+    :param parameters: A dictionary containing the values to substitute in the input string.
+    :return: The modified string with parameters replaced.
+    """
+    if not parameters:
+        return input_string
+
+    # Unset (None) values are dropped so their placeholders are left untouched
+    bound = {key: value for key, value in parameters.items() if value is not None}
+    return _ParameterTemplate(input_string).safe_substitute(bound)
+
+
 class CognitiveServicesCredential(TokenCredential):
     """A credential wrapper that ensures the correct scope for Azure Cognitive Services."""
-    
+
+    # Always use the Cognitive Services scope for Azure AI services
+    _SCOPE = ("https://cognitiveservices.azure.com/.default",)
+
+    # Refresh the cached token once it is within this many seconds of expiry
+    _REFRESH_MARGIN = 300
+
     def __init__(self, credential: TokenCredential):
         self._credential = credential
-        
+        self._cached_token: AccessToken | None = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, token: AccessToken | None) -> bool:
+        return token is not None and token.expires_on - time.time() > self._REFRESH_MARGIN
+
     def get_token(self, *scopes, **kwargs):
-        # Always use the Cognitive Services scope for Azure AI services
-        cognitive_services_scope = "https://cognitiveservices.azure.com/.default"
-        return self._credential.get_token(cognitive_services_scope, **kwargs)
+        # Claims challenges and tenant overrides must always reach the wrapped credential
+        if kwargs.get("claims") or kwargs.get("tenant_id"):
+            return self._credential.get_token(*self._SCOPE, **kwargs)
+
+        token = self._cached_token
+        if self._is_fresh(token):
+            return token
+
+        with self._lock:
+            if not self._is_fresh(self._cached_token):
+                self._cached_token = self._credential.get_token(*self._SCOPE, **kwargs)
+            return self._cached_token
+
+    def get_token_info(self, *scopes, options=None):
+        # azure-core's bearer policy prefers get_token_info, so it must be served from the same cache
+        if options and (options.get("claims") or options.get("tenant_id")):
+            return self._credential.get_token_info(*self._SCOPE, options=options)
+
+        return self._to_token_info(self.get_token(*self._SCOPE))
 
+    @classmethod
+    def _to_token_info(cls, token: AccessToken) -> AccessTokenInfo:
+        # Ask the policy to come back once the cached token is due for a refresh
+        return AccessTokenInfo(token.token, token.expires_on, refresh_on=token.expires_on - cls._REFRESH_MARGIN)
 
-def get_azure_credential():
+
+@functools.lru_cache(maxsize=1)
+def _get_base_credential() -> TokenCredential:
     use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
 
+    # azure.identity is imported lazily: it pulls in MSAL and friends, and only one credential is used
     if use_mi_auth:
+        from azure.identity import ManagedIdentityCredential
         mi_client_id = os.environ['MI_CLIENT_ID']
-        base_credential = ManagedIdentityCredential(
+        return ManagedIdentityCredential(
             client_id=mi_client_id
         )
-    else:
-        base_credential = DefaultAzureCredential()
-    
-    return CognitiveServicesCredential(base_credential)
+
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+
+@functools.lru_cache(maxsize=2)
+def get_azure_credential(wrap_scope: bool = True) -> TokenCredential:
+    """
+    Get the Azure credential shared by the setup scripts.
+
+    :param wrap_scope: Whether to pin tokens to the Cognitive Services scope (needed for the agents client).
+    :return: The credential.
+    """
+    base_credential = _get_base_credential()
+    if not wrap_scope:
+        return base_credential
+
+    return CognitiveServicesCredential(base_credential)
@@ -1,14 +1,13 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import logging
-import json
 from typing import Callable
 from openai import AzureOpenAI
 from azure.core.credentials import TokenCredential
 from azure.identity import get_bearer_token_provider
 from azure.search.documents import SearchClient
 from azure.search.documents.models import VectorizableTextQuery
-from utils import get_azure_credential
+from utils import get_azure_credential, json_dumps, json_loads
 
 def get_prompt(
     prompt: str,
@@ -106,7 +105,7 @@ class AOAIClient(AzureOpenAI):
         if response_message.tool_calls:
             for tool_call in response_message.tool_calls:
                 function_name = tool_call.function.name
-                function_args = json.loads(tool_call.function.arguments)
+                function_args = json_loads(tool_call.function.arguments)
                 self.logger.info(f"Function call: {function_name}")
                 self.logger.info(f"Function arguments: {function_args}")
 
@@ -116,7 +115,7 @@ class AOAIClient(AzureOpenAI):
                     func = self.functions[function_name]
                     func_response = func(func_input, language, id)
                 else:
-                    func_response = json.dumps({"error": "Unknown function"})
+                    func_response = json_dumps({"error": "Unknown function"})
 
                 function_responses.append(func_response)
                 self.logger.info(f"Function response: {str(func_response)}")
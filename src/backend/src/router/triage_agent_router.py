@@ -1,30 +1,78 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
-import json
+import re
+import copy
+import random
+import asyncio
 import logging
-from typing import Callable
-from azure.ai.agents import AgentsClient
-from azure.ai.agents.models import ListSortOrder, AgentThread
+import threading
+import functools
+from concurrent.futures import Future
+from typing import Awaitable, Callable
+import aiohttp
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.ai.agents.aio import AgentsClient
+from azure.ai.agents.models import (
+    Agent,
+    AgentsResponseFormat,
+    AgentStreamEvent,
+    MessageRole,
+    RunStatus,
+    ThreadMessage,
+    ThreadMessageOptions,
+    ThreadRun
+)
 from router.cqa_router import parse_response as parse_cqa_response
-from utils import get_azure_credential
+from utils import TTLCache, get_async_azure_credential, json_loads
 
 _logger = logging.getLogger(__name__)
-_logger.setLevel(logging.INFO)
 
 PII_ENABLED = os.environ.get("PII_ENABLED", "false").lower() == "true"
 CONFIG_DIR = os.environ.get("CONFIG_DIR", ".")
+# Connections kept open to the agents service, shared by all concurrent runs
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", 64))
+# Triage generation is kept deterministic. The completion token cap is off unless TRIAGE_MAX_TOKENS is set:
+# it also covers tool call arguments and the echoed CLU/CQA output, and a run that hits it ends without a reply
+TRIAGE_MAX_TOKENS = int(os.environ["TRIAGE_MAX_TOKENS"]) if os.environ.get("TRIAGE_MAX_TOKENS") else None
+TRIAGE_TEMPERATURE = float(os.environ.get("TRIAGE_TEMPERATURE", 0.0))
+# Failed runs are retried with jittered exponential backoff between attempts
+MAX_AGENT_RETRY = int(os.environ.get("MAX_AGENT_RETRY", 3))
+AGENT_RETRY_BASE_DELAY = float(os.environ.get("AGENT_RETRY_BASE_DELAY", 0.5))
+AGENT_RETRY_MAX_DELAY = float(os.environ.get("AGENT_RETRY_MAX_DELAY", 8.0))
+
+# Attach the raw tool response to routing results as "api_response" (off by default to keep results small)
+TRIAGE_ECHO_RAW = os.environ.get("TRIAGE_ECHO_RAW", "false").lower() == "true"
+# Continue each conversation id's agent thread instead of creating a thread per utterance.
+# Off by default: callers must pass an id unique to each conversation, such as the chat's conversation_id.
+TRIAGE_REUSE_THREADS = os.environ.get("TRIAGE_REUSE_THREADS", "false").lower() == "true"
+# Parsed routing results of recent utterances, keyed by (language, utterance, conversation id when threads
+# are reused); only enabled with CACHE_ENABLED, like the orchestrator's response cache
+CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "false").lower() == "true"
+_response_cache = TTLCache(
+    maxsize=int(os.environ.get("TRIAGE_CACHE_SIZE", 4096)) if CACHE_ENABLED else 0,
+    ttl=float(os.environ.get("TRIAGE_CACHE_TTL", 600))
+)
+_conversation_threads = TTLCache(
+    maxsize=int(os.environ.get("TRIAGE_THREAD_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("TRIAGE_THREAD_TTL", 3600))
+)
+# Conversation ids with a turn in flight on their thread (all router calls run on one event loop)
+_active_conversations: set = set()
 
 # Load agent IDs from config file
 config_file = os.path.join(CONFIG_DIR, "config.json")
-if os.path.exists(config_file):
-    with open(config_file, "r") as f:
-        AGENT_IDS = json.load(f)
-else:
+try:
+    with open(config_file, "rb") as f:
+        AGENT_IDS = json_loads(f.read())
+except FileNotFoundError:
     AGENT_IDS = {}
 
-# Use env variable for local testing
-# triage_agent_id = os.environ.get("TRIAGE_AGENT_ID")
 triage_agent_id = AGENT_IDS.get("TRIAGE_AGENT_ID")
 if not triage_agent_id:
     error_msg = "Missing required agent ID: TRIAGE_AGENT_ID"
@@ -32,18 +80,109 @@ if not triage_agent_id:
     raise ValueError(error_msg)
 
 
+def load_intent_shortcuts(
+    path: str | None
+) -> list[tuple[re.Pattern, str]]:
+    """
+    Compile the optional intent shortcut file, a JSON object mapping CLU intent names to lists of regexes.
+    Each regex is compiled on its own, case-insensitive, so its groups and backreferences are left intact.
+    Returns the (pattern, intent) pairs in file order.
+    """
+    if not path:
+        return []
+
+    with open(path, "rb") as f:
+        shortcuts = json_loads(f.read())
+
+    return [
+        (re.compile(pattern, re.IGNORECASE), intent)
+        for intent, patterns in shortcuts.items()
+        for pattern in patterns
+    ]
+
+
+# Utterances matching a shortcut are routed to its intent without running the agent
+_intent_shortcuts = load_intent_shortcuts(os.environ.get("TRIAGE_SHORTCUTS_FILE"))
+
+
+def match_intent_shortcut(
+    utterance: str
+) -> dict | None:
+    """
+    Route an utterance by the first intent shortcut it matches, as a parsed CLU result. Returns None on no match.
+    """
+    intent = next((intent for pattern, intent in _intent_shortcuts if pattern.search(utterance)), None)
+    if intent is None:
+        return None
+
+    return parse_response({
+        "type": "clu_result",
+        "response": {
+            "result": {
+                "conversations": [{
+                    "intents": [{"name": intent, "confidenceScore": 1.0}],
+                    "entities": []
+                }]
+            }
+        }
+    })
+
+
+@functools.lru_cache(maxsize=1)
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Start the background event loop that runs the async agent client for sync callers.
+    """
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="triage-agent-loop", daemon=True).start()
+    return loop
+
+
+@functools.lru_cache(maxsize=1)
+def _get_agents_client() -> AgentsClient:
+    """
+    Create the shared agents client. Must be called on the background event loop, which owns its HTTP session.
+    """
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=AGENT_POOL_SIZE, limit_per_host=AGENT_POOL_SIZE)
+    )
+    transport = AioHttpTransport(
+        session=session,
+        session_owner=False,
+        connection_timeout=5,
+        read_timeout=60
+    )
+    return AgentsClient(
+        endpoint=os.environ.get("AGENTS_PROJECT_ENDPOINT"),
+        credential=get_async_azure_credential(),
+        api_version="2025-05-15-preview",
+        transport=transport
+    )
+
+
+_triage_agent: Agent | None = None
+_token_refresher: asyncio.Task | None = None
+
+
+async def _get_triage_agent(agents_client: AgentsClient) -> Agent:
+    """
+    Fetch the triage agent once per process.
+    """
+    global _triage_agent
+    if _triage_agent is None:
+        _triage_agent = await agents_client.get_agent(agent_id=triage_agent_id)
+    return _triage_agent
+
+
 def create_triage_agent_router() -> Callable[[str, str, str], dict]:
     """
     Create triage agent router.
+
+    Sync wrapper around the async router: runs are multiplexed on a shared background event loop
+    instead of blocking one thread per request.
     """
-    project_endpoint = os.environ.get("AGENTS_PROJECT_ENDPOINT")
-    credential = get_azure_credential()
-    agents_client = AgentsClient(
-        endpoint=project_endpoint,
-        credential=credential,
-        api_version="2025-05-15-preview"
-    )
-    agent = agents_client.get_agent(agent_id=triage_agent_id)
+    # Build the shared async router up front so configuration errors surface here
+    _get_async_triage_agent_router()
 
     def triage_agent_router(
         utterance: str,
@@ -53,34 +192,123 @@ def create_triage_agent_router() -> Callable[[str, str, str], dict]:
         """
         Triage agent router function.
         """
+        return submit_triage_agent_router(utterance, language, id).result()
+
+    return triage_agent_router
+
+
+@functools.lru_cache(maxsize=1)
+def _get_async_triage_agent_router() -> Callable[[str, str, str], Awaitable[dict]]:
+    """
+    Create the async triage agent router shared by sync callers, on the background event loop.
+    """
+    return asyncio.run_coroutine_threadsafe(create_async_triage_agent_router(), _get_event_loop()).result()
+
+
+def submit_triage_agent_router(
+    utterance: str,
+    language: str,
+    id: str
+) -> Future:
+    """
+    Submit a triage request from sync code without blocking; the returned Future resolves to the routing result.
+    """
+    async_router = _get_async_triage_agent_router()
+    return asyncio.run_coroutine_threadsafe(async_router(utterance, language, id), _get_event_loop())
+
+
+async def create_async_triage_agent_router() -> Callable[[str, str, str], Awaitable[dict]]:
+    """
+    Create async triage agent router. Must be awaited on the event loop that will run the router.
+    """
+    global _token_refresher
+    agents_client = _get_agents_client()
+    agent = await _get_triage_agent(agents_client)
+
+    # Keep the client's token warm in the background, off the request path
+    if _token_refresher is None:
+        _token_refresher = asyncio.create_task(get_async_azure_credential().keep_fresh())
+
+    async def triage_agent_router(
+        utterance: str,
+        language: str,
+        id: str
+    ) -> dict:
+        """
+        Triage agent router function.
+        """
+        # Utterances matching a configured shortcut skip the agent entirely
+        shortcut_result = match_intent_shortcut(utterance)
+        if shortcut_result is not None:
+            _logger.debug("Triage result matched intent shortcut: %s", shortcut_result["intent"])
+            return shortcut_result
+
+        # Repeated utterances reuse the routing decision instead of running the agent again
+        # The exact utterance is the key, since results carry entity text and offsets taken from it
+        cache_key = (language, utterance, id if TRIAGE_REUSE_THREADS else None)
+        cached_result = _response_cache.get(cache_key)
+        if cached_result is not None:
+            _logger.debug("Triage result served from cache.")
+            return copy.deepcopy(cached_result)
+
         # Process the agent run and handle retries
-        max_retries = int(os.environ.get("MAX_AGENT_RETRY", 3))
+        max_retries = MAX_AGENT_RETRY
 
         # Initialize error return value
         error_return_value = {
             "error": ValueError("The run did not complete successfully.")
         }
 
-        # Create thread and process agent run with retries
-        for attempt in range(1, max_retries + 1):
-            try:
-                # Create thread for communication
-                thread = create_thread(agents_client, utterance)
+        # A conversation's thread takes one turn at a time; concurrent turns of it run on their own threads
+        reuse_thread = TRIAGE_REUSE_THREADS and id is not None and id not in _active_conversations
+        if reuse_thread:
+            _active_conversations.add(id)
+        try:
+            # Create thread and process agent run with retries
+            for attempt in range(1, max_retries + 1):
+                last_error = None
+                # Retries start a new thread, since a failed attempt already added the user message to its thread
+                thread_id = _conversation_threads.get(id) if reuse_thread and attempt == 1 else None
+                try:
+                    # Add the user message to the conversation's thread (or a new one) and stream the agent run
+                    thread_id, status, reply_text = await stream_agent_run(agents_client, agent, utterance, thread_id)
+                    _logger.debug("Run attempt %s finished with status: %s", attempt, status)
 
-                # Create and process the agent run
-                run = agents_client.runs.create_and_process(thread_id=thread.id, agent_id=agent.id)
-                _logger.info(f"Run attempt {attempt} finished with status: {run.status}")
+                    # Check the run produced a reply
+                    if reply_text is not None:
+                        # The conversation continues on the thread holding this turn's reply
+                        if reuse_thread:
+                            _conversation_threads.set(id, thread_id)
 
-                # Check the run status
-                if run.status == "completed":
-                    # If run is successful, handle the response
-                    return handle_successful_run(agents_client, thread, attempt)
+                        # If run is successful, handle the response
+                        parsed_result = handle_successful_run(reply_text, attempt)
+                        if parsed_result.get("error") is None:
+                            # The raw API response is not cached to keep entries small; the copy keeps
+                            # the caller from mutating the cached entities
+                            _response_cache.set(
+                                cache_key,
+                                copy.deepcopy({key: value for key, value in parsed_result.items() if key != "api_response"})
+                            )
+                        return parsed_result
 
-            # Handle exceptions during agent run processing
-            except Exception as e:
-                _logger.error(f"Logging error {e}")
-                error_return_value["error"] = e
-                _logger.error(f"Agent run {attempt + 1} failed with exception: {e}. Retrying...")
+                # Handle exceptions during agent run processing
+                except Exception as e:
+                    last_error = e
+                    error_return_value["error"] = e
+                    if thread_id is not None and isinstance(e, ResourceNotFoundError):
+                        # The service purged the conversation's thread; the next attempt starts a new one
+                        _conversation_threads.pop(id)
+                    elif not is_retryable_error(e):
+                        _logger.error("Agent run %s failed with non-retryable exception: %s", attempt, e)
+                        break
+                    _logger.error("Agent run %s failed with exception: %s. Retrying...", attempt, e)
+
+                # Back off before the next attempt
+                if attempt < max_retries:
+                    await asyncio.sleep(get_retry_delay(attempt, last_error))
+        finally:
+            if reuse_thread:
+                _active_conversations.discard(id)
 
         # If all attempts fail, return the error
         return error_return_value
@@ -88,60 +316,184 @@ def create_triage_agent_router() -> Callable[[str, str, str], dict]:
     return triage_agent_router
 
 
-def create_thread(
+def is_retryable_error(
+    error: Exception
+) -> bool:
+    """
+    Whether a failed run is worth retrying: client errors (bad request, auth, missing agent) will not
+    succeed on a second attempt, while timeouts, throttling, server and transport errors may.
+    """
+    if isinstance(error, HttpResponseError) and error.status_code is not None:
+        return not (400 <= error.status_code < 500) or error.status_code in (408, 429)
+    return True
+
+
+def get_retry_delay(
+    attempt: int,
+    error: Exception | None = None
+) -> float:
+    """
+    Seconds to wait before retrying after the given attempt: the service's Retry-After when throttled,
+    otherwise capped exponential backoff with jitter.
+    """
+    if isinstance(error, HttpResponseError) and error.status_code == 429 and error.response is not None:
+        retry_after = error.response.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), AGENT_RETRY_MAX_DELAY)
+            except ValueError:
+                pass
+
+    delay = min(AGENT_RETRY_MAX_DELAY, AGENT_RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.5)
+
+
+# Run statuses that need no cancelling: the run is over, or already being cancelled
+_FINAL_RUN_STATUSES = frozenset([
+    RunStatus.COMPLETED,
+    RunStatus.FAILED,
+    RunStatus.CANCELLING,
+    RunStatus.CANCELLED,
+    RunStatus.EXPIRED,
+    "incomplete",
+])
+
+
+async def stream_agent_run(
     agents_client: AgentsClient,
-    utterance: str
-) -> AgentThread:
+    agent: Agent,
+    utterance: str,
+    thread_id: str | None = None
+) -> tuple[str, str | None, str | None]:
     """
-    Helper function to create a thread for the agent run.
+    Helper function to add the user message to the given thread, or create a thread holding it,
+    and stream the agent run on it.
+    Returns the thread ID, the last reported run status and the text of the assistant reply, if one completed.
     """
-    # Create thread for communication
-    thread = agents_client.threads.create()
-    _logger.info(f"Created thread, ID: {thread.id}")
+    if thread_id is None:
+        thread = await agents_client.threads.create(
+            messages=[ThreadMessageOptions(role=MessageRole.USER, content=utterance)]
+        )
+        thread_id = thread.id
+        _logger.debug("Created thread, ID: %s", thread_id)
+    else:
+        await agents_client.messages.create(thread_id=thread_id, role=MessageRole.USER, content=utterance)
+        _logger.debug("Added message to thread, ID: %s", thread_id)
 
-    # Create and add user message to thread
-    message = agents_client.messages.create(
-        thread_id=thread.id,
-        role="user",
-        content=utterance,
-    )
-    _logger.info(f"Created message: {message['id']}")
-    return thread
+    run_id = None
+    status = None
+    reply_text = None
+    try:
+        async with await agents_client.runs.stream(
+            thread_id=thread_id,
+            agent_id=agent.id,
+            max_completion_tokens=TRIAGE_MAX_TOKENS,
+            temperature=TRIAGE_TEMPERATURE,
+            top_p=1.0,
+            response_format=AgentsResponseFormat(type="json_object")
+        ) as stream:
+            # The stream is read to the end, so the run has finished before its thread is reused
+            async for event_type, event_data, _ in stream:
+                if isinstance(event_data, ThreadRun):
+                    run_id = event_data.id
+                    status = event_data.status
+                elif event_type == AgentStreamEvent.THREAD_MESSAGE_COMPLETED and isinstance(event_data, ThreadMessage):
+                    if event_data.role == MessageRole.AGENT and event_data.text_messages:
+                        reply_text = event_data.text_messages[-1].text.value
+                elif event_type == AgentStreamEvent.ERROR:
+                    raise ValueError(f"Agent run stream failed: {event_data}")
+    except BaseException:
+        # Do not leave an active run behind on the thread, or the next message added to it is rejected
+        if run_id is not None and status not in _FINAL_RUN_STATUSES:
+            try:
+                await agents_client.runs.cancel(thread_id=thread_id, run_id=run_id)
+            except Exception as e:
+                _logger.warning("Failed to cancel run %s: %s", run_id, e)
+        raise
+
+    return thread_id, status, reply_text
+
+
+# Markdown code fence an agent may wrap its JSON reply in
+_CODE_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+# Control characters other than tab, newline and carriage return
+_CONTROL_CHARS_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _normalize_json_string(text: str) -> str:
+    """
+    Strip code fences, prose around the outermost JSON object, and stray control characters
+    from an agent reply.
+    """
+    fenced = _CODE_FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+
+    start = text.find("{")
+    if start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for index in range(start, len(text)):
+            char = text[index]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif char == "\\":
+                    escaped = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    text = text[start:index + 1]
+                    break
+
+    return _CONTROL_CHARS_RE.sub("", text)
+
+
+def _convert_string_to_json(text: str) -> dict:
+    """
+    Load an agent reply as JSON, retrying on its normalized form before giving up.
+    """
+    try:
+        return json_loads(text)
+    except ValueError:
+        pass
+
+    normalized = _normalize_json_string(text)
+    try:
+        return json_loads(normalized)
+    except ValueError as e:
+        raise ValueError(f"Agent response is not valid JSON ({e}): {normalized[:200]!r}")
 
 
 def handle_successful_run(
-    agents_client: AgentsClient,
-    thread: AgentThread,
+    reply_text: str,
     attempt: int
 ) -> dict:
     """
     Helper function to handle a successful agent run
     """
     # Parse the agent response from the successful run
-    _logger.info(f"Agent run succeeded on attempt {attempt}.")
-    messages = agents_client.messages.list(thread_id=thread.id, order=ListSortOrder.ASCENDING)
-    for msg in messages:
-        # Grab the last text message from the assistant
-        if msg.text_messages and msg.role == "assistant":
-            last_text = msg.text_messages[-1]
-            _logger.info(f"{msg.role}: {last_text.text.value}")
-
-            # Load the agent response into a JSON
-            try:
-                data = json.loads(last_text.text.value)
-                print(data)
-                _logger.info(f"Agent response parsed successfully: {data}")
-                parsed_result = parse_response(data)
-                return parsed_result
+    _logger.debug("Agent run succeeded on attempt %s.", attempt)
+    _logger.debug("assistant: %s", reply_text)
 
-            # Raise error if agent response cannot be parsed
-            except Exception as e:
-                _logger.error(f"Agent response failed with error: {e}")
-                raise ValueError(f"Failed to parse agent response: {e}")
+    # Load the agent response into a JSON
+    try:
+        data = _convert_string_to_json(reply_text)
+        _logger.debug("Agent response parsed successfully: %s", data)
+        parsed_result = parse_response(data)
+        return parsed_result
 
-    # If no valid response found, raise an error to be handled by the caller
-    _logger.error("No valid agent response found in the thread.")
-    raise ValueError("No valid agent response found in the thread.")
+    # Raise error if agent response cannot be parsed
+    except Exception as e:
+        _logger.error("Agent response failed with error: %s", e)
+        raise ValueError(f"Failed to parse agent response: {e}")
 
 
 def parse_convai_clu_response(
@@ -150,8 +502,9 @@ def parse_convai_clu_response(
     """
     Parse CLU response from ConvAI CLU tool used by the triage agent.
     """
-    intent = response["result"]["conversations"][0]["intents"][0]["name"]
-    entities = response["result"]["conversations"][0]["entities"]
+    conversation = response["result"]["conversations"][0]
+    intent = conversation["intents"][0]["name"]
+    entities = conversation["entities"]
     error = None
 
     # Filter based on intent:
@@ -168,31 +521,31 @@ def parse_convai_clu_response(
     }
 
 
+# Response parser for each tool kind the triage agent can report
+_PARSERS: dict[str, Callable[[dict], dict]] = {
+    "clu_result": parse_convai_clu_response,
+    "cqa_result": parse_cqa_response,
+}
+
+
 def parse_response(
     response: dict
 ) -> dict:
     """
     Parse Triage Agent Message response.
     """
-    # Check tool kind used by the agent
+    # Parse the response based on tool used by the agent
     kind = response["type"]
-    error = None
-    parsed_result = {}
-
-    # Parse the response based on tool used
-    if kind == "clu_result":
-        parsed_result = parse_convai_clu_response(
-            response=response["response"]
-        )
-    elif kind == "cqa_result":
-        parsed_result = parse_cqa_response(
-            response=response["response"]
-        )
+    tool_response = response["response"]
+    parser = _PARSERS.get(kind)
+    if parser is None:
+        parsed_result = {"error": f"Unexpected agent intent kind: {kind}"}
     else:
-        error = f"Unexpected agent intent kind: {kind}"
+        parsed_result = parser(tool_response)
 
-    if error is not None:
-        parsed_result["error"] = error
-    parsed_result["api_response"] = response["response"]
+    if TRIAGE_ECHO_RAW:
+        parsed_result["api_response"] = tool_response
+    else:
+        parsed_result.pop("api_response", None)
 
     return parsed_result
@@ -3,7 +3,9 @@
 import os
 import json
 import logging
+import aiohttp
 import pii_redacter
+from dataclasses import dataclass
 from fastapi import FastAPI, HTTPException
 from fastapi.concurrency import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
@@ -11,6 +13,7 @@ from fastapi.responses import JSONResponse, FileResponse
 from pydantic import BaseModel
 from semantic_kernel_orchestrator import SemanticKernelOrchestrator
 from azure.identity.aio import DefaultAzureCredential
+from azure.core.pipeline.transport import AioHttpTransport
 from semantic_kernel.agents import AzureAIAgent
 from utils import get_azure_credential
 from aoai_client import AOAIClient, get_prompt
@@ -24,7 +27,9 @@ from typing import List
 # load_dotenv()
 
 
-class ChatMessage(BaseModel):
+# Plain slotted dataclass; pydantic still validates it as part of ChatRequest
+@dataclass(slots=True, frozen=True)
+class ChatMessage:
     role: str
     content: str
 
@@ -39,6 +44,8 @@ class ChatRequest(BaseModel):
 PROJECT_ENDPOINT = os.environ.get("AGENTS_PROJECT_ENDPOINT")
 MODEL_NAME = os.environ.get("AOAI_DEPLOYMENT")
 CONFIG_DIR = os.environ.get("CONFIG_DIR", ".")
+# Connections kept open to the agents service, shared by all agent calls
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", 64))
 config_file = os.path.join(CONFIG_DIR, "config.json")
 
 # Read config.json file from the config directory
@@ -147,11 +154,11 @@ async def orchestrate_chat(
     if history_str:
         task = f"query: {message}, {history_str}"
 
-    print(f"Processing message: {task} with chat_id: {chat_id}")
+    logging.debug("Processing message: %s with chat_id: %s", task, chat_id)
     try:
         # Handle PII redaction if enabled
         if PII_ENABLED:
-            print(f"Redacting PII for message: {task} with chat_id: {chat_id}")
+            logging.debug("Redacting PII for message: %s with chat_id: %s", task, chat_id)
             task = pii_redacter.redact(
                 text=task,
                 id=chat_id,
@@ -165,7 +172,7 @@ async def orchestrate_chat(
 
             if isinstance(response, dict) and response.get("error"):
                 # If semantic kernel fails, use fallback
-                print(f"Semantic kernel failed, using fallback for: {message}")
+                logging.warning("Semantic kernel failed, using fallback for: %s", message)
                 response = fallback_function(
                     message,
                     "en",  # Assuming English for simplicity, adjust as needed
@@ -199,15 +206,18 @@ async def lifespan(app: FastAPI):
         print(f"Using PROJECT_ENDPOINT: {PROJECT_ENDPOINT}")
         print(f"Using MODEL_NAME: {MODEL_NAME}")
 
-        async with DefaultAzureCredential(exclude_interactive_browser_credential=False) as creds:
-            async with AzureAIAgent.create_client(credential=creds, endpoint=PROJECT_ENDPOINT) as client:
+        # Keep-alive connection pool for the agents client, so agent calls reuse TLS connections
+        connector = aiohttp.TCPConnector(limit=AGENT_POOL_SIZE, limit_per_host=AGENT_POOL_SIZE)
+        async with DefaultAzureCredential(exclude_interactive_browser_credential=False) as creds, \
+                aiohttp.ClientSession(connector=connector) as session:
+            transport = AioHttpTransport(session=session, session_owner=False, connection_timeout=5)
+            async with AzureAIAgent.create_client(credential=creds, endpoint=PROJECT_ENDPOINT, transport=transport) as client:
                 orchestrator = SemanticKernelOrchestrator(
                     client,
                     MODEL_NAME,
                     PROJECT_ENDPOINT,
                     AGENT_IDS,
-                    fallback_function,
-                    3
+                    fallback_function
                 )
                 await orchestrator.create_agent_group_chat()
 
@@ -217,7 +227,10 @@ async def lifespan(app: FastAPI):
                 app.state.orchestrator = orchestrator
 
                 # Yield control back to FastAPI lifespan
-                yield
+                try:
+                    yield
+                finally:
+                    await orchestrator.close()
 
     except Exception as e:
         logging.error(f"Error during setup: {e}")
@@ -244,7 +257,7 @@ async def chat_endpoint(request: ChatRequest):
         orchestrator = app.state.orchestrator
         # pass in message and history
         responses, need_more_info = await orchestrate_chat(request.message, request.history, orchestrator, chat_id=0)
-        print("[APP]: need_more_info:", need_more_info)
+        logging.debug("[APP]: need_more_info: %s", need_more_info)
         return JSONResponse(
             content={
                 "messages": responses,
@@ -1,8 +1,14 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
-import json
+import sys
+import random
 import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import StrEnum
 from typing import Callable
 from semantic_kernel.agents import AzureAIAgent, GroupChatOrchestration, GroupChatManager, BooleanResult, StringResult, MessageResult
 from semantic_kernel.contents import ChatMessageContent, ChatHistory, AuthorRole
@@ -11,120 +17,241 @@ from agents.order_status_plugin import OrderStatusPlugin
 from agents.order_refund_plugin import OrderRefundPlugin
 from agents.order_cancel_plugin import OrderCancellationPlugin
 from azure.ai.projects import AIProjectClient
-from pydantic import BaseModel
+from utils import TTLCache, json_dumps, json_loads
 
-# Define the confidence threshold for CLU intent recognition
-confidence_threshold = float(os.environ.get("CLU_CONFIDENCE_THRESHOLD", "0.5"))
-cqa_confidence = float(os.environ.get("CQA_CONFIDENCE", "0.5"))
+_logger = logging.getLogger(__name__)
 
 
-class ChatMessage(BaseModel):
-    role: str
-    content: str
+@dataclass(frozen=True, slots=True)
+class OrchestratorConfig:
+    """
+    Orchestrator tunables, read from the environment once at import time.
+    """
+    # Confidence threshold for CQA answers
+    cqa_confidence_threshold: float = float(os.environ.get("CQA_CONFIDENCE", "0.5"))
+    # CLU confidence at or above which the TriageAgent hands off straight to the intent's custom agent
+    clu_direct_route_threshold: float = float(os.environ.get("CLU_DIRECT_ROUTE_THRESHOLD", "0.85"))
+    # Orchestration attempts per message, at least one; separate from the triage router's MAX_AGENT_RETRY
+    max_retries: int = max(1, int(os.environ.get("ORCHESTRATION_MAX_RETRIES", 3)))
+    # Seconds to wait for the agent group chat to produce a final answer
+    orchestration_timeout: float = float(os.environ.get("ORCHESTRATION_TIMEOUT", 120))
+    # Reuse final responses for repeated messages instead of re-running the agent chain
+    cache_enabled: bool = os.environ.get("CACHE_ENABLED", "false").lower() == "true"
+    cache_size: int = 512
+    # Seconds a cached response stays valid, 0 disables the cache
+    cache_ttl: float = float(os.environ.get("RESPONSE_CACHE_TTL", 3600))
+    # Idle started runtimes kept for reuse, and the number of messages a runtime serves before it is replaced
+    runtime_pool_size: int = int(os.environ.get("RUNTIME_POOL_SIZE", 4))
+    runtime_max_uses: int = 100
+
+
+CONFIG = OrchestratorConfig()
+
+
+# The custom agent plugins are stateless, so one instance of each is shared by all agents
+ORDER_STATUS_PLUGIN = OrderStatusPlugin()
+ORDER_REFUND_PLUGIN = OrderRefundPlugin()
+ORDER_CANCEL_PLUGIN = OrderCancellationPlugin()
+
+# Description and plugins of each orchestrator agent, by its agent ID key in config.json
+AGENT_SETTINGS = {
+    "TRANSLATION_AGENT_ID": ("A translation agent that translates to English", []),
+    "TRIAGE_AGENT_ID": ("A triage agent that routes inquiries to the proper custom agent.", []),
+    "HEAD_SUPPORT_AGENT_ID": ("A head support agent that routes inquiries to the proper custom agent.", []),
+    "ORDER_STATUS_AGENT_ID": ("An agent that checks order status", [ORDER_STATUS_PLUGIN]),
+    "ORDER_CANCEL_AGENT_ID": ("An agent that checks on cancellations", [ORDER_CANCEL_PLUGIN]),
+    "ORDER_REFUND_AGENT_ID": ("An agent that checks on refunds", [ORDER_REFUND_PLUGIN]),
+}
+
+
+
+class AgentName(StrEnum):
+    """
+    Names of the group chat participants, as set on the agent definitions in AI Foundry.
+    """
+    TRANSLATION = "TranslationAgent"
+    TRIAGE = "TriageAgent"
+    HEAD_SUPPORT = "HeadSupportAgent"
+    ORDER_STATUS = "OrderStatusAgent"
+    ORDER_CANCEL = "OrderCancelAgent"
+    ORDER_REFUND = "OrderRefundAgent"
+
+
+# Custom agent handling each CLU intent, used to skip the HeadSupportAgent on confident CLU results
+INTENT_AGENTS = {
+    "OrderStatus": AgentName.ORDER_STATUS,
+    "CancelOrder": AgentName.ORDER_CANCEL,
+    "RefundStatus": AgentName.ORDER_REFUND,
+}
+CUSTOM_AGENT_NAMES = frozenset(INTENT_AGENTS.values())
+
+# Errors raised by a malformed agent message: invalid JSON, missing fields or unexpected types.
+# The routing functions return no next agent on these; anything else propagates to the retry loop.
+MALFORMED_MESSAGE_ERRORS = (ValueError, KeyError, IndexError, TypeError, AttributeError)
+
+
+def as_bool(value) -> bool:
+    """
+    Coerce an agent's boolean flag to bool; agents are prompted to emit "True"/"False" strings.
+    """
+    return value is True or str(value).strip().lower() == "true"
+
+
+def parse_content(message: ChatMessageContent) -> dict | None:
+    """
+    Parse the JSON content of an agent message, or return None if it is not JSON.
+    """
+    try:
+        return json_loads(message.content)
+    except (ValueError, TypeError):
+        return None
+
+
+def normalize_message(message: str) -> str:
+    """
+    Normalize a message for response caching, so that case and whitespace differences share a cache entry.
+    """
+    return " ".join(message.casefold().split())
+
+
+def get_participant(participant_descriptions: dict, name: str | None) -> str | None:
+    """
+    Return the agent name if it is a participant of the group chat, otherwise None.
+    """
+    return name if name in participant_descriptions else None
 
 
 # Custom functions to route messages from specific roles / agents
 def route_user_message(participant_descriptions: dict) -> StringResult:
     try:
         return StringResult(
-            result=next((agent for agent in participant_descriptions.keys() if agent == "TranslationAgent"), None),
+            result=get_participant(participant_descriptions, AgentName.TRANSLATION),
             reason="Routing to TranslationAgent for initial translation."
         )
-    except Exception as e:
+    except MALFORMED_MESSAGE_ERRORS as e:
         return StringResult(
             result=None,
             reason=f"Error routing to TranslationAgent: {e}"
         )
 
 
-def route_translation_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
+def route_translation_message(last_message: ChatMessageContent, participant_descriptions: dict, parsed: dict | None = None) -> StringResult:
     try:
-        parsed = json.loads(last_message.content)
+        if parsed is None:
+            parsed = json_loads(last_message.content)
         response = parsed['response']
-        print("[TranslationAgent] Translated message:", response)
+        _logger.debug("[TranslationAgent] Translated message: %s", response)
 
         return StringResult(
-            result=next((agent for agent in participant_descriptions.keys() if agent == "TriageAgent"), None),
+            result=get_participant(participant_descriptions, AgentName.TRIAGE),
             reason="Routing to TriageAgent for message translation."
         )
-    except Exception as e:
+    except MALFORMED_MESSAGE_ERRORS as e:
         return StringResult(
             result=None,
             reason=f"Error routing to TriageAgent: {e}"
         )
 
 
-def route_triage_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
+def route_triage_message(last_message: ChatMessageContent, participant_descriptions: dict, parsed: dict | None = None) -> StringResult:
     try:
-        parsed = json.loads(last_message.content)
+        if parsed is None:
+            parsed = json_loads(last_message.content)
+        result_type = parsed.get("type")
+
         # Handle CQA results
-        if parsed.get("type") == "cqa_result":
-            print("[SYSTEM]: CQA result received, checking confidence...")
+        if result_type == "cqa_result":
+            _logger.debug("[SYSTEM]: CQA result received, checking confidence...")
             confidence = parsed["response"]["answers"][0]["confidenceScore"]
 
-            if confidence >= cqa_confidence:
+            if confidence >= CONFIG.cqa_confidence_threshold:
                 return StringResult(
-                    result=next((agent for agent in participant_descriptions.keys() if agent == "TranslationAgent"), None),
+                    result=get_participant(participant_descriptions, AgentName.TRANSLATION),
                     reason="Routing to TranslationAgent for final translation."
                 )
             else:
-                raise ValueError(f"[TriageAgent] CQA result returned low confidence score: {confidence}. Expected at least {cqa_confidence}.")
+                raise ValueError(f"[TriageAgent] CQA result returned low confidence score: {confidence}. Expected at least {CONFIG.cqa_confidence_threshold}.")
 
         # Handle CLU results
-        if parsed.get("type") == "clu_result":
-            print("[SYSTEM]: CLU result received, checking intent and entities...")
-            intent = parsed["response"]["result"]["conversations"][0]["intents"][0]["name"]
-            print("[TriageAgent]: detected intent ", intent, ", routing to HeadSupportAgent for custom agent selection...")
+        if result_type == "clu_result":
+            _logger.debug("[SYSTEM]: CLU result received, checking intent and entities...")
+            top_intent = parsed["response"]["result"]["conversations"][0]["intents"][0]
+            # Intern the parsed name so the lookup against the literal keys compares by identity
+            intent = sys.intern(top_intent["name"])
+            target_agent = INTENT_AGENTS.get(intent)
+
+            # Agents missing from the group chat are left to the HeadSupportAgent
+            if top_intent.get("confidenceScore", 0) >= CONFIG.clu_direct_route_threshold \
+                    and get_participant(participant_descriptions, target_agent) is not None:
+                _logger.debug("[TriageAgent]: detected intent %s with high confidence, routing to %s...", intent, target_agent)
+                return StringResult(
+                    result=target_agent,
+                    reason=f"Routing to {target_agent} for high confidence intent {intent}."
+                )
+
+            _logger.debug("[TriageAgent]: detected intent %s, routing to HeadSupportAgent for custom agent selection...", intent)
             return StringResult(
-                result=next((agent for agent in participant_descriptions.keys() if agent == "HeadSupportAgent"), None),
+                result=get_participant(participant_descriptions, AgentName.HEAD_SUPPORT),
                 reason="Routing to HeadSupportAgent for custom agent selection."
             )
 
     # Handle errors in triage agent response
-    except Exception as e:
-        print(f"[SYSTEM]: Error processing TriageAgent message: {e}")
+    except MALFORMED_MESSAGE_ERRORS as e:
+        _logger.error("[SYSTEM]: Error processing TriageAgent message: %s", e)
         return StringResult(
             result=None,
             reason="Error processing TriageAgent message."
         )
 
 
-def route_head_support_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
+def route_head_support_message(last_message: ChatMessageContent, participant_descriptions: dict, parsed: dict | None = None) -> StringResult:
     try:
         # Grab the target agent from the parsed content
-        parsed = json.loads(last_message.content)
+        if parsed is None:
+            parsed = json_loads(last_message.content)
         route = parsed.get("target_agent")
 
-        print("[HeadSupportAgent] Routing to target custom agent:", route)
+        _logger.debug("[HeadSupportAgent] Routing to target custom agent: %s", route)
         return StringResult(
-            result=next((agent for agent in participant_descriptions.keys() if agent == route), None),
+            result=get_participant(participant_descriptions, route),
             reason=f"Routing to target custom agent: {route}."
         )
-    except Exception as e:
-        print(f"[SYSTEM]: Error processing HeadSupportAgent message: {e}")
+    except MALFORMED_MESSAGE_ERRORS as e:
+        _logger.error("[SYSTEM]: Error processing HeadSupportAgent message: %s", e)
         return StringResult(
             result=None,
             reason="Error processing HeadSupportAgent message."
         )
 
 
-def route_custom_agent_message(last_message: ChatMessageContent, participant_descriptions: dict) -> StringResult:
+def route_custom_agent_message(last_message: ChatMessageContent, participant_descriptions: dict, parsed: dict | None = None) -> StringResult:
     try:
-        response = json.loads(last_message.content)["response"]
-        print(f"[{last_message.name}]: Response content: {response}")
-        print(f"[TranslationAgent]: Translating {response}")
+        if parsed is None:
+            parsed = json_loads(last_message.content)
+        response = parsed["response"]
+        _logger.debug("[%s]: Response content: %s", last_message.name, response)
+        _logger.debug("[TranslationAgent]: Translating %s", response)
         return StringResult(
-            result=next((agent for agent in participant_descriptions.keys() if agent == "TranslationAgent"), None),
+            result=get_participant(participant_descriptions, AgentName.TRANSLATION),
             reason="Handle final message translation back to original language."
         )
-    except Exception as e:
-        print(f"[SYSTEM]: Error processing custom agent message: {e}")
+    except MALFORMED_MESSAGE_ERRORS as e:
+        _logger.error("[SYSTEM]: Error processing custom agent message: %s", e)
         return StringResult(
             result=None,
             reason="Error processing custom agent message."
         )
 
 
+# Routing function for the messages of each agent
+AGENT_ROUTERS = {
+    AgentName.TRANSLATION: route_translation_message,
+    AgentName.TRIAGE: route_triage_message,
+    AgentName.HEAD_SUPPORT: route_head_support_message,
+    **dict.fromkeys(CUSTOM_AGENT_NAMES, route_custom_agent_message),
+}
+
+
 class CustomGroupChatManager(GroupChatManager):
     """
     Custom group chat manager for Semantic Kernel Group Chat Orchestration.
@@ -138,11 +265,9 @@ class CustomGroupChatManager(GroupChatManager):
                 reason="Chat history is empty."
             )
 
-        # Get the last message from the chat history
-        last_message = chat_history[-1]
-
+        # The last message from the chat history is the final agent response
         return MessageResult(
-            result=ChatMessageContent(role="assistant", content=last_message.content),
+            result=chat_history[-1],
             reason="Returning the last agent's response."
         )
 
@@ -157,34 +282,26 @@ class CustomGroupChatManager(GroupChatManager):
         This method decides how to select the next agent based on the current message and agent with custom logic based on agent responses.
         """
         last_message = chat_history[-1] if chat_history else None
-        format_agent_response(last_message)
 
         # Process user messages
         if not last_message or last_message.role == AuthorRole.USER:
-            print("[SYSTEM]: Last message is from the USER, routing to TranslationAgent for initial translation...")
+            if last_message:
+                format_agent_response(last_message)
+            _logger.debug("[SYSTEM]: Last message is from the USER, routing to TranslationAgent for initial translation...")
             return route_user_message(participant_descriptions)
 
-        elif last_message.name == "TranslationAgent":
-            print("[SYSTEM]: Last message is from TranslationAgent, routing to TriageAgent for message translation...")
-            return route_translation_message(last_message, participant_descriptions)
+        # Parse the agent response once for both logging and routing
+        parsed = parse_content(last_message)
+        format_agent_response(last_message, parsed)
 
-        # Process triage agent messages
-        elif last_message.name == "TriageAgent":
-            print("[SYSTEM]: Last message is from TriageAgent, checking if agent returned a CQA or CLU result...")
-            return route_triage_message(last_message, participant_descriptions)
-
-        # Process head support agent messages
-        elif last_message.name == "HeadSupportAgent":
-            print("[SYSTEM]: Last message is from HeadSupportAgent, choosing custom agent...")
-            return route_head_support_message(last_message, participant_descriptions)
-
-        # Process custom agent messages - customize as needed
-        elif last_message.name in ["OrderStatusAgent", "OrderRefundAgent", "OrderCancelAgent"]:
-            print(f"[SYSTEM]: Last message is from {last_message.name}, translate back to original language if needed.")
-            return route_custom_agent_message(last_message, participant_descriptions)
+        # Process agent messages with the routing function of their sender
+        router = AGENT_ROUTERS.get(last_message.name)
+        if router is not None:
+            _logger.debug("[SYSTEM]: Last message is from %s, routing with %s...", last_message.name, router.__name__)
+            return router(last_message, participant_descriptions, parsed)
 
         # Default case
-        print("[SYSTEM]: No valid routing logic found, returning None.")
+        _logger.warning("[SYSTEM]: No valid routing logic found, returning None.")
         return StringResult(
             result=None,
             reason="No valid routing logic found."
@@ -205,9 +322,8 @@ class CustomGroupChatManager(GroupChatManager):
             )
 
         # Check if message is from the translation agent and is not the initial translation
-        if last_message.name == "TranslationAgent" and len(chat_history) > 3:
-            print(last_message.name)
-            print(last_message.content)
+        if last_message.name == AgentName.TRANSLATION and len(chat_history) > 3:
+            _logger.debug("[%s]: %s", last_message.name, last_message.content)
             return BooleanResult(
                 result=True,
                 reason="Chat terminated due to TranslationAgent response."
@@ -228,7 +344,7 @@ class SemanticKernelOrchestrator:
         project_endpoint: str,
         agent_ids: dict,
         fallback_function: Callable[[str, str, str], dict],
-        max_retries: int = 3
+        max_retries: int = CONFIG.max_retries
     ):
         """
         Initialize the semantic kernel orchestrator with the AI Project client, model name, project endpoint,
@@ -239,73 +355,73 @@ class SemanticKernelOrchestrator:
         self.project_endpoint = project_endpoint
         self.agent_ids = agent_ids
         self.fallback_function = fallback_function
-        self.max_retries = max_retries
+        self.max_retries = max(1, max_retries)
 
-        # Initialize plugins for custom agents
-        self.order_status_plugin = OrderStatusPlugin()
-        self.order_refund_plugin = OrderRefundPlugin()
-        self.order_cancel_plugin = OrderCancellationPlugin()
+        # Semantic Kernel agents by agent ID key, created on first use
+        self._agents: dict[str, AzureAIAgent] = {}
+        self._agent_locks: defaultdict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
 
-    async def initialize_agents(self) -> list:
-        """
-        Initialize the Semantic Kernel Azure AI agents for the semantic kernel orchestrator.
-        This method retrieves the agent definitions from AI Foundry and creates AzureAIAgent instances for each foundry agent.
-        """
-        # Grab the agent definition from AI Foundry
-        triage_agent_definition = await self.client.agents.get_agent(self.agent_ids["TRIAGE_AGENT_ID"])
-        triage_agent = AzureAIAgent(
-            client=self.client,
-            definition=triage_agent_definition,
-            description="A triage agent that routes inquiries to the proper custom agent."
+        # Final (response, need_more_info) results by message hash
+        self._response_cache = TTLCache(
+            maxsize=CONFIG.cache_size if CONFIG.cache_enabled and CONFIG.cache_ttl > 0 else 0,
+            ttl=CONFIG.cache_ttl
         )
 
-        order_status_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_STATUS_AGENT_ID"])
-        order_status_agent = AzureAIAgent(
-            client=self.client,
-            definition=order_status_agent_definition,
-            description="An agent that checks order status",
-            plugins=[OrderStatusPlugin()],
-        )
+        # Group chat orchestration, built once by create_agent_group_chat
+        self.orchestration: GroupChatOrchestration | None = None
+        self._orchestration_lock = asyncio.Lock()
 
-        order_cancel_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_CANCEL_AGENT_ID"])
-        order_cancel_agent = AzureAIAgent(
-            client=self.client,
-            definition=order_cancel_agent_definition,
-            description="An agent that checks on cancellations",
-            plugins=[OrderCancellationPlugin()],
-        )
+        # Idle started runtimes with their use counts
+        self._runtime_pool: asyncio.Queue[tuple[InProcessRuntime, int]] = asyncio.Queue(maxsize=CONFIG.runtime_pool_size)
 
-        order_refund_agent_definition = await self.client.agents.get_agent(self.agent_ids["ORDER_REFUND_AGENT_ID"])
-        order_refund_agent = AzureAIAgent(
-            client=self.client,
-            definition=order_refund_agent_definition,
-            description="An agent that checks on refunds",
-            plugins=[OrderRefundPlugin()],
-        )
+    async def get_or_create_agent(self, agent_id_key: str) -> AzureAIAgent:
+        """
+        Get the Semantic Kernel Azure AI agent for an agent ID key of config.json (e.g. "TRIAGE_AGENT_ID").
+        The agent definition is retrieved from AI Foundry on first use only; concurrent callers share that fetch.
+        """
+        agent = self._agents.get(agent_id_key)
+        if agent is not None:
+            return agent
+
+        async with self._agent_locks[agent_id_key]:
+            agent = self._agents.get(agent_id_key)
+            if agent is None:
+                description, plugins = AGENT_SETTINGS[agent_id_key]
+                definition = await self.client.agents.get_agent(self.agent_ids[agent_id_key])
+                agent = AzureAIAgent(
+                    client=self.client,
+                    definition=definition,
+                    description=description,
+                    plugins=plugins,
+                )
+                self._agents[agent_id_key] = agent
+        return agent
 
-        head_support_agent_definition = await self.client.agents.get_agent(self.agent_ids["HEAD_SUPPORT_AGENT_ID"])
-        head_support_agent = AzureAIAgent(
-            client=self.client,
-            definition=head_support_agent_definition,
-            description="A head support agent that routes inquiries to the proper custom agent.",
-        )
+    async def initialize_agents(self) -> list:
+        """
+        Initialize the Semantic Kernel Azure AI agents for the semantic kernel orchestrator.
+        This method retrieves the agent definitions from AI Foundry and creates AzureAIAgent instances for each foundry agent.
+        """
+        # Grab the agent definitions from AI Foundry concurrently - the lookups do not depend on each other
+        (
+            translation_agent,
+            triage_agent,
+            head_support_agent,
+            order_status_agent,
+            order_cancel_agent,
+            order_refund_agent,
+        ) = await asyncio.gather(*(self.get_or_create_agent(agent_id_key) for agent_id_key in AGENT_SETTINGS))
 
-        translation_agent_definition = await self.client.agents.get_agent(self.agent_ids["TRANSLATION_AGENT_ID"])
-        translation_agent = AzureAIAgent(
-            client=self.client,
-            definition=translation_agent_definition,
-            description="A translation agent that translates to English",
-        )
         # Set the translation agent for the orchestrator to handle fallback translations
         self.translation_agent = translation_agent
 
-        print("Agents initialized successfully.")
-        print(f"Triage Agent ID: {triage_agent.id}")
-        print(f"Head Support Agent ID: {head_support_agent.id}")
-        print(f"Order Status Agent ID: {order_status_agent.id}")
-        print(f"Order Cancel Agent ID: {order_cancel_agent.id}")
-        print(f"Order Refund Agent ID: {order_refund_agent.id}")
-        print(f"Translation Agent ID: {translation_agent.id}")
+        _logger.info("Agents initialized successfully.")
+        _logger.info("Triage Agent ID: %s", triage_agent.id)
+        _logger.info("Head Support Agent ID: %s", head_support_agent.id)
+        _logger.info("Order Status Agent ID: %s", order_status_agent.id)
+        _logger.info("Order Cancel Agent ID: %s", order_cancel_agent.id)
+        _logger.info("Order Refund Agent ID: %s", order_refund_agent.id)
+        _logger.info("Translation Agent ID: %s", translation_agent.id)
 
         return [translation_agent, triage_agent, head_support_agent, order_status_agent, order_cancel_agent, order_refund_agent]
 
@@ -314,74 +430,148 @@ class SemanticKernelOrchestrator:
         Create an agent group chat with the specified chat ID after all agents have been initialized.
         This method initializes the agents and sets up the agent group chat with custom selection and termination strategies
         """
-        created_agents = await self.initialize_agents()
-        print("Agents initialized:", [agent.name for agent in created_agents])
+        # Concurrent callers wait for the first one instead of building their own group chat
+        async with self._orchestration_lock:
+            if self.orchestration is not None:
+                return
 
-        self.orchestration = GroupChatOrchestration(
-            members=created_agents,
-            manager=CustomGroupChatManager(),
-        )
+            created_agents = await self.initialize_agents()
+            _logger.info("Agents initialized: %s", [agent.name for agent in created_agents])
 
-        print("Agent group chat created successfully.")
+            self.orchestration = GroupChatOrchestration(
+                members=created_agents,
+                manager=CustomGroupChatManager(),
+            )
+
+        _logger.info("Agent group chat created successfully.")
+
+    def acquire_runtime(self) -> tuple[InProcessRuntime, int]:
+        """
+        Take an idle runtime and its use count from the pool, or start a new runtime if none is free.
+        """
+        try:
+            return self._runtime_pool.get_nowait()
+        except asyncio.QueueEmpty:
+            runtime = InProcessRuntime()
+            runtime.start()
+            return runtime, 0
+
+    async def release_runtime(self, runtime: InProcessRuntime, uses: int, failed: bool = False, timed_out: bool = False) -> None:
+        """
+        Return a runtime to the pool, or stop it if its invocation failed, it has served its maximum uses or the pool is full.
+        Each orchestration invocation registers actors on the runtime, so runtimes are replaced periodically.
+        Timed out runtimes are stopped right away; the others once their remaining work is done.
+        """
+        if not failed and not timed_out and uses < CONFIG.runtime_max_uses:
+            try:
+                self._runtime_pool.put_nowait((runtime, uses))
+                return
+            except asyncio.QueueFull:
+                pass
+
+        try:
+            if timed_out:
+                await runtime.stop()
+            else:
+                await runtime.stop_when_idle()
+        except Exception as e:
+            _logger.warning("[SHUTDOWN ERROR]: Runtime failed to shut down cleanly: %s", e)
+
+    async def close(self) -> None:
+        """
+        Stop the pooled runtimes.
+        """
+        while not self._runtime_pool.empty():
+            runtime, _ = self._runtime_pool.get_nowait()
+            try:
+                await runtime.stop()
+            except Exception as e:
+                _logger.warning("[SHUTDOWN ERROR]: Runtime failed to shut down cleanly: %s", e)
 
     async def process_message(self, task_content: str) -> str:
         """
         Process a message in the agent group chat.
         This method creates a new agent group chat and processes the message.
         """
+        cache_key = hashlib.sha256(normalize_message(task_content).encode("utf-8")).hexdigest()
+        cached_result = self._response_cache.get(cache_key)
+        if cached_result is not None:
+            _logger.debug("[SYSTEM]: Returning cached response.")
+            return cached_result
+
         retry_count = 0
         last_exception = None
         need_more_info = False
 
         # Use retry logic to handle potential errors during chat invocation
         while retry_count < self.max_retries:
-            print(f"\n[RETRY ATTEMPT {retry_count}] Starting new runtime...")
-            runtime = InProcessRuntime()
-            runtime.start()
-
-            try:
-                orchestration_result = await self.orchestration.invoke(
-                    task=task_content,
-                    runtime=runtime,
-                )
-
-                try:
-                    # Timeout to avoid indefinite hangs
-                    value = await orchestration_result.get(timeout=120)
-                    print(f"\n***** Result *****\n{value.content}")
+            _logger.debug("[RETRY ATTEMPT %s] Invoking orchestration...", retry_count)
 
-                    final_response = json.loads(value.content)
+            # Each attempt runs on a pooled runtime; each invocation registers its own actors on it
+            runtime, uses = self.acquire_runtime()
+            failed = True
+            timed_out = False
 
-                    print("[SYSTEM]: Final response is ", final_response['response']['final_answer'])
-                    need_more_info = final_response['response']['need_more_info']
-                    return final_response['response']['final_answer'], need_more_info
+            # Timeouts to avoid indefinite hangs; one deadline covers both the invocation and its result
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + CONFIG.orchestration_timeout
 
-                except Exception as e:
-                    print(f"[EXCEPTION]: Orchestration failed with exception: {e}")
-                    last_exception = {"type": "exception", "message": str(e)}
-                    retry_count += 1
+            try:
+                orchestration_result = await asyncio.wait_for(
+                    self.orchestration.invoke(
+                        task=task_content,
+                        runtime=runtime,
+                    ),
+                    timeout=CONFIG.orchestration_timeout
+                )
+                value = await orchestration_result.get(timeout=max(0.0, deadline - loop.time()))
+                _logger.debug("***** Result *****\n%s", value.content)
+
+                final_response = json_loads(value.content)['response']
+                final_answer = final_response['final_answer']
+
+                _logger.debug("[SYSTEM]: Final response is %s", final_answer)
+                need_more_info = as_bool(final_response.get('need_more_info'))
+                result = final_answer, need_more_info
+                self._response_cache.set(cache_key, result)
+                failed = False
+                return result
+
+            # A hung agent chain is unlikely to recover, so do not wait out another timeout
+            except TimeoutError:
+                _logger.error("[EXCEPTION]: Orchestration timed out after %s seconds", CONFIG.orchestration_timeout)
+                last_exception = {"type": "timeout", "message": f"Orchestration timed out after {CONFIG.orchestration_timeout} seconds"}
+                timed_out = True
+                break
+
+            except Exception as e:
+                _logger.error("[EXCEPTION]: Orchestration failed with exception: %s", e)
+                last_exception = {"type": "exception", "message": str(e)}
 
             finally:
-                try:
-                    await runtime.stop_when_idle()
-                except Exception as e:
-                    print(f"[SHUTDOWN ERROR]: Runtime failed to shut down cleanly: {e}")
-
-            # Short delay before retry
-            await asyncio.sleep(1)
-
-        if last_exception:
-            return {
-                "error": f"An error occurred: {last_exception}"
-            }, need_more_info
-
-
-def format_agent_response(response):
-    try:
-        # Pretty print the JSON response
-        formatted_content = json.dumps(json.loads(response.content), indent=2)
-        print(f"[{response.name if response.name else 'USER'}]: \n{formatted_content}\n")
-    except json.JSONDecodeError:
-        # Fallback to regular print if content is not JSON
-        print(f"[{response.name}]: {response.content}\n")
+                # A failed attempt's actors may still be running, so its runtime is stopped rather than reused
+                await self.release_runtime(runtime, uses + 1, failed=failed, timed_out=timed_out)
+
+            # Back off with jitter before retrying
+            retry_count += 1
+            if retry_count < self.max_retries:
+                await asyncio.sleep(min(8.0, 0.25 * 2 ** retry_count) + random.uniform(0, 0.25))
+
+        return {
+            "error": f"An error occurred: {last_exception}"
+        }, need_more_info
+
+
+def format_agent_response(response, parsed: dict | None = None):
+    # Pretty printing re-parses the message, so only do it when it will be logged
+    if _logger.isEnabledFor(logging.DEBUG):
+        if parsed is None:
+            parsed = parse_content(response)
+        if parsed is not None:
+            # Pretty print the JSON response
+            formatted_content = json_dumps(parsed, indent=True)
+            _logger.debug("[%s]: \n%s\n", response.name if response.name else 'USER', formatted_content)
+        else:
+            # Fallback to regular print if content is not JSON
+            _logger.debug("[%s]: %s\n", response.name, response.content)
     return response.content
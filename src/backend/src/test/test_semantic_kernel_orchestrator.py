@@ -0,0 +1,108 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import asyncio
+import pytest
+from semantic_kernel.contents import ChatMessageContent, AuthorRole
+from semantic_kernel_orchestrator import AGENT_ROUTERS, CONFIG, AgentName, SemanticKernelOrchestrator, as_bool
+from utils import json_dumps
+
+"""
+Unit tests for the helpers of semantic_kernel_orchestrator.py. They need no Azure resources.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_semantic_kernel_orchestrator.py -v
+"""
+
+ALL_PARTICIPANTS = {name: "" for name in AgentName}
+
+
+def agent_message(name: str, content: dict | str) -> ChatMessageContent:
+    if isinstance(content, dict):
+        content = json_dumps(content)
+    return ChatMessageContent(role=AuthorRole.ASSISTANT, name=name, content=content)
+
+
+def clu_message(intent: str, confidence: float) -> ChatMessageContent:
+    return agent_message(AgentName.TRIAGE, {
+        "type": "clu_result",
+        "response": {"result": {"conversations": [{"intents": [{"name": intent, "confidenceScore": confidence}]}]}},
+    })
+
+
+def route(message: ChatMessageContent, participants: dict = ALL_PARTICIPANTS) -> str | None:
+    return AGENT_ROUTERS[message.name](message, participants).result
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, True), ("True", True), (" true ", True),
+    (False, False), ("False", False), ("yes", False), (None, False), (1, False),
+])
+def test_as_bool(value, expected):
+    assert as_bool(value) is expected
+
+
+def test_every_agent_has_a_router():
+    assert set(AGENT_ROUTERS) == set(AgentName)
+
+
+@pytest.mark.parametrize("name, content, expected", [
+    (AgentName.TRANSLATION, {"response": "hello"}, AgentName.TRIAGE),
+    (AgentName.HEAD_SUPPORT, {"target_agent": "OrderRefundAgent"}, AgentName.ORDER_REFUND),
+    (AgentName.ORDER_STATUS, {"response": "shipped"}, AgentName.TRANSLATION),
+])
+def test_agent_routes(name, content, expected):
+    assert route(agent_message(name, content)) == expected
+
+
+def test_confident_cqa_result_routes_to_translation():
+    message = agent_message(AgentName.TRIAGE, {
+        "type": "cqa_result",
+        "response": {"answers": [{"confidenceScore": CONFIG.cqa_confidence_threshold}]},
+    })
+    assert route(message) == AgentName.TRANSLATION
+
+
+def test_confident_clu_intent_routes_to_custom_agent():
+    assert route(clu_message("CancelOrder", CONFIG.clu_direct_route_threshold)) == AgentName.ORDER_CANCEL
+
+
+def test_unconfident_clu_intent_routes_to_head_support():
+    assert route(clu_message("CancelOrder", CONFIG.clu_direct_route_threshold - 0.01)) == AgentName.HEAD_SUPPORT
+
+
+def test_unknown_clu_intent_routes_to_head_support():
+    assert route(clu_message("None", 1.0)) == AgentName.HEAD_SUPPORT
+
+
+def test_direct_route_falls_back_when_agent_is_absent():
+    participants = {name: "" for name in AgentName if name != AgentName.ORDER_CANCEL}
+    assert route(clu_message("CancelOrder", 1.0), participants) == AgentName.HEAD_SUPPORT
+
+
+class FailingOrchestration:
+    """Group chat orchestration whose every invocation fails."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def invoke(self, task, runtime):
+        self.calls += 1
+        raise RuntimeError("agent chain failed")
+
+
+def test_failed_orchestration_returns_error_tuple():
+    async def run():
+        orchestrator = SemanticKernelOrchestrator(None, "model", "endpoint", {}, None, max_retries=0)
+        orchestrator.orchestration = FailingOrchestration()
+        try:
+            return await orchestrator.process_message("Where is my order?"), orchestrator.orchestration.calls
+        finally:
+            await orchestrator.close()
+
+    (response, need_more_info), calls = asyncio.run(run())
+
+    # A retry count below one still makes a single attempt, and a failure is reported as an error result
+    assert calls == 1
+    assert "agent chain failed" in response["error"]
+    assert need_more_info is False
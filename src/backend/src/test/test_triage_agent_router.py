@@ -0,0 +1,92 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import os
+import importlib
+import pytest
+from utils import json_dumps
+
+"""
+Unit tests for the offline helpers of router/triage_agent_router.py. They need no Azure resources.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_triage_agent_router.py -v
+"""
+
+
+@pytest.fixture(scope="module")
+def triage(tmp_path_factory):
+    # The router reads its agent ID from config.json at import time
+    config_dir = tmp_path_factory.mktemp("config")
+    (config_dir / "config.json").write_text('{"TRIAGE_AGENT_ID": "test-agent"}')
+    previous = os.environ.get("CONFIG_DIR")
+    os.environ["CONFIG_DIR"] = str(config_dir)
+    try:
+        yield importlib.import_module("router.triage_agent_router")
+    finally:
+        if previous is None:
+            os.environ.pop("CONFIG_DIR", None)
+        else:
+            os.environ["CONFIG_DIR"] = previous
+
+
+def test_normalize_strips_code_fence(triage):
+    text = 'Here you go:\n```json\n{"type": "clu_result"}\n```'
+    assert triage._normalize_json_string(text) == '{"type": "clu_result"}'
+
+
+def test_normalize_keeps_outermost_object(triage):
+    text = 'Result: {"a": {"b": "}"}} trailing prose {"c": 1}'
+    assert triage._normalize_json_string(text) == '{"a": {"b": "}"}}'
+
+
+def test_normalize_drops_control_characters(triage):
+    assert triage._normalize_json_string('{"a":\x00 "b\x1f"}') == '{"a": "b"}'
+
+
+def test_convert_parses_valid_json_as_is(triage):
+    assert triage._convert_string_to_json('{"a": 1}') == {"a": 1}
+
+
+def test_convert_parses_wrapped_json(triage):
+    text = 'Sure! ```{"type": "cqa_result", "response": {"answers": []}}``` Let me know.'
+    assert triage._convert_string_to_json(text) == {"type": "cqa_result", "response": {"answers": []}}
+
+
+def test_convert_rejects_non_json(triage):
+    with pytest.raises(ValueError, match="not valid JSON"):
+        triage._convert_string_to_json("no JSON here")
+
+
+@pytest.fixture
+def shortcuts(triage, tmp_path, monkeypatch):
+    def load(shortcut_map: dict):
+        path = tmp_path / "shortcuts.json"
+        path.write_text(json_dumps(shortcut_map))
+        monkeypatch.setattr(triage, "_intent_shortcuts", triage.load_intent_shortcuts(str(path)))
+    return load
+
+
+def test_shortcut_routes_to_its_intent(triage, shortcuts):
+    shortcuts({"OrderStatus": [r"\bwhere is my order\b"], "CancelOrder": [r"\bcancel\b"]})
+
+    assert triage.match_intent_shortcut("Where is my order?")["intent"] == "OrderStatus"
+    assert triage.match_intent_shortcut("Please CANCEL it")["intent"] == "CancelOrder"
+    assert triage.match_intent_shortcut("What is the return policy?") is None
+
+
+def test_shortcut_patterns_keep_their_own_groups(triage, shortcuts):
+    # Named groups and backreferences inside a pattern must not affect which intent is reported
+    shortcuts({
+        "RefundStatus": [r"refund (?P<order>\d+)"],
+        "OrderStatus": [r"status of (?P<order>\d+)"],
+        "CancelOrder": [r"(cancel) \1"],
+    })
+
+    assert triage.match_intent_shortcut("refund 12345 please")["intent"] == "RefundStatus"
+    assert triage.match_intent_shortcut("status of 12345")["intent"] == "OrderStatus"
+    assert triage.match_intent_shortcut("cancel cancel")["intent"] == "CancelOrder"
+
+
+def test_no_shortcuts_file(triage):
+    assert triage.load_intent_shortcuts(None) == []
@@ -0,0 +1,134 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT License.
+import time
+import asyncio
+from azure.core.credentials import AccessToken
+from azure.core.pipeline import PipelineContext, PipelineRequest
+from azure.core.pipeline.policies import AsyncBearerTokenCredentialPolicy, BearerTokenCredentialPolicy
+from azure.core.rest import HttpRequest
+import utils
+from utils import AsyncCognitiveServicesCredential, CognitiveServicesCredential, TTLCache
+
+"""
+Unit tests for the shared helpers in utils.py. They need no Azure resources.
+
+Launch this test suite using pytest:
+cd src/backend/src/
+pytest test/test_utils.py -v
+"""
+
+SCOPE = "https://cognitiveservices.azure.com/.default"
+
+
+class FakeCredential:
+    """Credential that issues a new numbered token on every call."""
+
+    def __init__(self, *lifetimes: float):
+        self.lifetimes = list(lifetimes) or [3600]
+        self.calls = 0
+
+    def get_token(self, *scopes, **kwargs):
+        lifetime = self.lifetimes[min(self.calls, len(self.lifetimes) - 1)]
+        self.calls += 1
+        return AccessToken(f"token-{self.calls}", int(time.time() + lifetime))
+
+
+class FakeAsyncCredential(FakeCredential):
+    """Async flavour of FakeCredential."""
+
+    async def get_token(self, *scopes, **kwargs):
+        return FakeCredential.get_token(self, *scopes, **kwargs)
+
+
+def authorize(policy) -> str:
+    request = PipelineRequest(HttpRequest("GET", "https://example.cognitiveservices.azure.com"), PipelineContext(None))
+    policy.on_request(request)
+    return request.http_request.headers["Authorization"]
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is now the least recently used entry
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(utils.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=4, ttl=10)
+    cache.set("key", "value")
+
+    now[0] += 9
+    assert cache.get("key") == "value"
+    now[0] += 1
+    assert cache.get("key", "missing") == "missing"
+    assert cache.pop("key") is None
+
+
+def test_ttl_cache_disabled_without_size():
+    cache = TTLCache(maxsize=0, ttl=60)
+    cache.set("key", "value")
+    assert cache.get("key") is None
+
+
+def test_token_reused_until_refresh_margin():
+    base = FakeCredential(3600)
+    credential = CognitiveServicesCredential(base)
+
+    assert credential.get_token(SCOPE).token == "token-1"
+    assert credential.get_token(SCOPE).token == "token-1"
+    assert base.calls == 1
+
+
+def test_token_refreshed_within_refresh_margin():
+    # The first token expires inside the refresh margin, so the next call exchanges a new one
+    base = FakeCredential(CognitiveServicesCredential._REFRESH_MARGIN - 1, 3600)
+    credential = CognitiveServicesCredential(base)
+
+    assert credential.get_token(SCOPE).token == "token-1"
+    assert credential.get_token(SCOPE).token == "token-2"
+    assert credential.get_token(SCOPE).token == "token-2"
+    assert base.calls == 2
+
+
+def test_sdk_policies_share_cached_token():
+    base = FakeCredential()
+    credential = CognitiveServicesCredential(base)
+
+    # Each SDK client has its own bearer policy; all of them must be served from the wrapper's cache
+    first = authorize(BearerTokenCredentialPolicy(credential, SCOPE))
+    second = authorize(BearerTokenCredentialPolicy(credential, SCOPE))
+
+    assert first == second == "Bearer token-1"
+    assert credential.get_token(SCOPE).token == "token-1"
+    assert base.calls == 1
+
+
+def test_async_policy_uses_background_refreshed_token():
+    async def run():
+        # The first token is already inside the refresh margin, so keep_fresh replaces it right away
+        base = FakeAsyncCredential(10, 3600)
+        credential = AsyncCognitiveServicesCredential(base)
+        refresher = asyncio.create_task(credential.keep_fresh(retry_interval=0.01))
+        try:
+            for _ in range(100):
+                if base.calls >= 2:
+                    break
+                await asyncio.sleep(0.01)
+
+            request = PipelineRequest(HttpRequest("GET", "https://example.cognitiveservices.azure.com"), PipelineContext(None))
+            await AsyncBearerTokenCredentialPolicy(credential, SCOPE).on_request(request)
+        finally:
+            refresher.cancel()
+
+        assert request.http_request.headers["Authorization"] == "Bearer token-2"
+        assert base.calls == 2
+
+    asyncio.run(run())
@@ -1,7 +1,8 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
-import json
+import uuid
+import logging
 import importlib
 import pii_redacter
 from json import JSONDecodeError
@@ -12,7 +13,7 @@ from azure.search.documents import SearchClient
 from aoai_client import AOAIClient, get_prompt
 from router.router_type import RouterType
 from unified_conversation_orchestrator import UnifiedConversationOrchestrator
-from utils import get_azure_credential
+from utils import get_azure_credential, json_loads
 
 
 DIST_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "dist"))
@@ -81,10 +82,9 @@ orchestrator = UnifiedConversationOrchestrator(
     router_type=router_type,
     fallback_function=fallback_function
 )
-chat_id = 0
 
 
-def orchestrate_chat(message: str) -> list[str]:
+def orchestrate_chat(message: str, chat_id: str) -> list[str]:
     if PII_ENABLED:
         # Redact PII:
         message = pii_redacter.redact(
@@ -95,10 +95,10 @@ def orchestrate_chat(message: str) -> list[str]:
 
     # Break user message into separate utterances:
     utterances = extract_client.chat_completion(message)
-    print(f"Utterances: {utterances}")
+    logging.debug("Utterances: %s", utterances)
     if not isinstance(utterances, list):
         try:
-            utterances = json.loads(utterances)
+            utterances = json_loads(utterances)
         except JSONDecodeError:
             # Harmful content case:
             if PII_ENABLED:
@@ -141,8 +141,8 @@ def orchestrate_chat(message: str) -> list[str]:
             answer = orchestration_response["result"]["answer"]
             response = answer
 
-        print(f"Orchestration response: {orchestration_response}")
-        print(f"Parsed response: {response}")
+        logging.debug("Orchestration response: %s", orchestration_response)
+        logging.debug("Parsed response: %s", response)
         responses.append(response)
 
     if PII_ENABLED:
@@ -163,10 +163,12 @@ async def home_page():
 async def chat(request: Request):
     content = await request.json()
     message = content["message"]
+    # The client's conversation id ties together the turns of one chat; requests without one stand alone
+    chat_id = str(content.get("conversation_id") or uuid.uuid4())
 
-    responses = orchestrate_chat(message)
+    responses = orchestrate_chat(message, chat_id)
 
-    print(f"responses: {responses}")
+    logging.debug("responses: %s", responses)
     return JSONResponse({
         "messages": responses
     })
@@ -1,23 +1,186 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT License.
 import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import functools
+from collections import OrderedDict
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from azure.identity import DefaultAzureCredential, ManagedIdentityCredential
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+from azure.identity.aio import ManagedIdentityCredential as AsyncManagedIdentityCredential
 from azure.core.credentials import TokenCredential
-from azure.core.credentials import AccessToken
+from azure.core.credentials import AccessToken, AccessTokenInfo
+from azure.core.credentials_async import AsyncTokenCredential
+
+_logger = logging.getLogger(__name__)
+
+
+def json_loads(data: str | bytes):
+    """
+    Parse JSON with orjson when available, falling back to the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(data, indent: bool = False) -> str:
+    """
+    Serialize JSON with orjson when available, falling back to the standard library.
+    With indent, the output is pretty-printed with two-space indentation.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None).decode("utf-8")
+    return json.dumps(data, indent=2 if indent else None)
+
+
+class TTLCache:
+    """A small thread-safe LRU cache whose entries expire ttl seconds after they are set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
 
 
 class CognitiveServicesCredential(TokenCredential):
     """A credential wrapper that ensures the correct scope for Azure Cognitive Services."""
-    
+
+    # Always use the Cognitive Services scope for Azure AI services
+    _SCOPE = ("https://cognitiveservices.azure.com/.default",)
+
+    # Refresh the cached token once it is within this many seconds of expiry
+    _REFRESH_MARGIN = 300
+
     def __init__(self, credential: TokenCredential):
         self._credential = credential
-        
+        self._cached_token: AccessToken | None = None
+        self._lock = threading.Lock()
+
+    def _is_fresh(self, token: AccessToken | None) -> bool:
+        return token is not None and token.expires_on - time.time() > self._REFRESH_MARGIN
+
     def get_token(self, *scopes, **kwargs):
-        # Always use the Cognitive Services scope for Azure AI services
-        cognitive_services_scope = "https://cognitiveservices.azure.com/.default"
-        return self._credential.get_token(cognitive_services_scope, **kwargs)
+        # Claims challenges and tenant overrides must always reach the wrapped credential
+        if kwargs.get("claims") or kwargs.get("tenant_id"):
+            return self._credential.get_token(*self._SCOPE, **kwargs)
+
+        token = self._cached_token
+        if self._is_fresh(token):
+            return token
+
+        with self._lock:
+            if not self._is_fresh(self._cached_token):
+                self._cached_token = self._credential.get_token(*self._SCOPE, **kwargs)
+            return self._cached_token
+
+    def get_token_info(self, *scopes, options=None):
+        # azure-core's bearer policy prefers get_token_info, so it must be served from the same cache
+        if options and (options.get("claims") or options.get("tenant_id")):
+            return self._credential.get_token_info(*self._SCOPE, options=options)
+
+        return self._to_token_info(self.get_token(*self._SCOPE))
+
+    @classmethod
+    def _to_token_info(cls, token: AccessToken) -> AccessTokenInfo:
+        # Ask the policy to come back once the cached token is due for a refresh
+        return AccessTokenInfo(token.token, token.expires_on, refresh_on=token.expires_on - cls._REFRESH_MARGIN)
+
+
+class AsyncCognitiveServicesCredential(AsyncTokenCredential):
+    """Async counterpart of CognitiveServicesCredential, for the aio SDK clients."""
 
+    _SCOPE = CognitiveServicesCredential._SCOPE
+    _REFRESH_MARGIN = CognitiveServicesCredential._REFRESH_MARGIN
 
+    def __init__(self, credential: AsyncTokenCredential):
+        self._credential = credential
+        self._cached_token: AccessToken | None = None
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, token: AccessToken | None) -> bool:
+        return token is not None and token.expires_on - time.time() > self._REFRESH_MARGIN
+
+    async def get_token(self, *scopes, **kwargs):
+        # Claims challenges and tenant overrides must always reach the wrapped credential
+        if kwargs.get("claims") or kwargs.get("tenant_id"):
+            return await self._credential.get_token(*self._SCOPE, **kwargs)
+
+        token = self._cached_token
+        if self._is_fresh(token):
+            return token
+
+        async with self._lock:
+            if not self._is_fresh(self._cached_token):
+                self._cached_token = await self._credential.get_token(*self._SCOPE, **kwargs)
+            return self._cached_token
+
+    async def get_token_info(self, *scopes, options=None):
+        # The aio bearer policy prefers get_token_info, so it must be served from the same cache
+        if options and (options.get("claims") or options.get("tenant_id")):
+            return await self._credential.get_token_info(*self._SCOPE, options=options)
+
+        return CognitiveServicesCredential._to_token_info(await self.get_token(*self._SCOPE))
+
+    async def keep_fresh(self, retry_interval: float = 60) -> None:
+        """
+        Refresh the cached token as soon as it goes stale, so requests never wait on a token exchange.
+        Runs until cancelled.
+        """
+        while True:
+            try:
+                token = await self.get_token(*self._SCOPE)
+                delay = token.expires_on - time.time() - self._REFRESH_MARGIN + 1
+            except Exception as e:
+                _logger.warning("Background token refresh failed: %s", e)
+                delay = retry_interval
+            await asyncio.sleep(max(retry_interval, delay))
+
+    async def close(self) -> None:
+        await self._credential.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+
+@functools.lru_cache(maxsize=1)
 def get_azure_credential():
     use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
 
@@ -30,3 +193,18 @@ def get_azure_credential():
         base_credential = DefaultAzureCredential()
     
     return CognitiveServicesCredential(base_credential)
+
+
+@functools.lru_cache(maxsize=1)
+def get_async_azure_credential():
+    use_mi_auth = os.environ.get('USE_MI_AUTH', 'false').lower() == 'true'
+
+    if use_mi_auth:
+        mi_client_id = os.environ['MI_CLIENT_ID']
+        base_credential = AsyncManagedIdentityCredential(
+            client_id=mi_client_id
+        )
+    else:
+        base_credential = AsyncDefaultAzureCredential()
+
+    return AsyncCognitiveServicesCredential(base_credential)
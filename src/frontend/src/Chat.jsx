@@ -9,6 +9,7 @@ const Chat = () => {
     const [needMoreInfo, setNeedMoreInfo] = useState(false);
 
     const messageEndRef = useRef(null);
+    const conversationId = useRef(crypto.randomUUID());
     const welcomeMessage = 'Ask a question...';
 
     const scrollToBottom = () => {
@@ -35,6 +36,7 @@ const Chat = () => {
             body: JSON.stringify({
                 message: userMessageContent,
                 history: historyMessages,
+                conversation_id: conversationId.current,
             })
         };
     };